@@ -5,9 +5,10 @@ import asyncio
 import logging
 from collections import OrderedDict
 
-from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import discovery, config_validation
+from homeassistant.config_entries import ConfigEntry, SOURCE_IMPORT
+from homeassistant.const import CONF_USERNAME, CONF_PASSWORD, ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.helpers import config_validation
 import voluptuous as vol
 
 _LOGGER = logging.getLogger(__name__)
@@ -17,37 +18,117 @@ REQUIREMENTS = ['websockets', 'pycryptodome', 'zeroconf']
 
 DOMAIN = 'sonoff'
 CONF_REGION = 'region'
+CONF_CAPTURE = 'capture'
+CONF_KNOWN_DEVICES = 'known_devices'
+
+PLATFORMS = ['switch', 'light', 'cover', 'remote', 'sensor']
+
+SERVICE_SET_SWITCHES = 'set_switches'
+EVENT_SET_SWITCHES_RESULT = 'sonoff_set_switches_result'
+ATTR_STATE = 'state'
 
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
         vol.Required(CONF_USERNAME): config_validation.string,
         vol.Required(CONF_PASSWORD): config_validation.string,
         vol.Optional(CONF_REGION, default='eu'): config_validation.string,
+        vol.Optional(CONF_CAPTURE): config_validation.string,
+        vol.Optional(CONF_KNOWN_DEVICES): dict,
     }, extra=vol.ALLOW_EXTRA),
 }, extra=vol.ALLOW_EXTRA)
 
+SET_SWITCHES_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): config_validation.entity_ids,
+    vol.Required(ATTR_STATE): config_validation.boolean,
+})
+
 
 async def async_setup(hass: HomeAssistant, config: OrderedDict):
-    from .coolkit_client import CoolkitSession
-    from .coolkit_client.discover import CoolkitDevicesDiscovery
+    if DOMAIN in config:
+        hass.async_create_task(hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={'source': SOURCE_IMPORT},
+            data=dict(config[DOMAIN])
+        ))
+
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
+    from .coolkit_client import CoolkitBulkCommands, CoolkitRuntime
 
-    known_devices = config.get('sonoff', {}).get('known_devices')
+    known_devices = entry.data.get(CONF_KNOWN_DEVICES)
     if known_devices is None:
         known_devices = {}
 
-    res = await CoolkitSession.login(
-        config.get(DOMAIN, {}).get(CONF_USERNAME, ''),
-        config.get(DOMAIN, {}).get(CONF_PASSWORD, ''),
-        config.get(DOMAIN, {}).get(CONF_REGION, '')
-    )
-
-    if not res:
+    # Login comes first, nothing is left running when it fails
+    if not await CoolkitRuntime.start(
+        entry.data.get(CONF_USERNAME, ''),
+        entry.data.get(CONF_PASSWORD, ''),
+        entry.data.get(CONF_REGION, ''),
+        known_devices,
+        capture_path=entry.data.get(CONF_CAPTURE),
+        run_blocking=hass.async_add_executor_job
+    ):
         _LOGGER.error("Unable to login to coolikt server, please check your credentials.")
+        return False
+
+    hass.data[DOMAIN] = {'switches': {}}
+
+    for component in PLATFORMS:
+        hass.async_create_task(hass.config_entries.async_forward_entry_setup(entry, component))
+
+    async def async_set_switches(call: ServiceCall) -> None:
+        """Set many switches at once, with one concurrent command per device"""
+        switches = hass.data[DOMAIN]['switches']
+        targets = []
+
+        for entity_id in call.data[ATTR_ENTITY_ID]:
+            if entity_id not in switches:
+                _LOGGER.warning("Unknown sonoff switch " + entity_id)
+                continue
+
+            targets.append((switches[entity_id], call.data[ATTR_STATE]))
+
+        results = await CoolkitBulkCommands.set_switches(targets)
+        hass.bus.async_fire(EVENT_SET_SWITCHES_RESULT, {'results': results})
 
-    await CoolkitDevicesDiscovery.discover(known_devices)
-    await asyncio.sleep(2)
+    hass.services.async_register(DOMAIN, SERVICE_SET_SWITCHES, async_set_switches, schema=SET_SWITCHES_SCHEMA)
+    hass.data[DOMAIN]['unsub_update_listener'] = entry.add_update_listener(async_reload_entry)
 
-    for component in ['switch', 'sensor']:
-        await discovery.async_load_platform(hass, component, DOMAIN, {}, config)
+    return True
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    from .coolkit_client import CoolkitDevicesRepository, CoolkitRuntime
+
+    unloaded = all(await asyncio.gather(*[
+        hass.config_entries.async_forward_entry_unload(entry, component)
+        for component in PLATFORMS
+    ]))
+
+    if not unloaded:
+        return False
+
+    hass.services.async_remove(DOMAIN, SERVICE_SET_SWITCHES)
+    hass.data[DOMAIN]['unsub_update_listener']()
+
+    for device in CoolkitDevicesRepository.get_devices().values():
+        device.remove_callbacks('hass')
+
+    await CoolkitRuntime.stop(hass.async_add_executor_job)
+
+    hass.data.pop(DOMAIN)
 
     return True
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    from .coolkit_client import CoolkitSession, CoolkitDevicesRepository
+
+    CoolkitSession.logout()
+    await CoolkitDevicesRepository.clear()
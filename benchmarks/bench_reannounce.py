@@ -0,0 +1,89 @@
+"""
+Benchmark the LAN decode pipeline on an encrypted re-announce storm.
+
+Builds a capture where every device re-announces its encrypted TXT record several times at once,
+then replays it at maximum speed through the real decode and dispatch path.
+
+    python benchmarks/bench_reannounce.py --devices 500 --rounds 3
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from coolkit_client import CoolkitCapture, CoolkitDecodePipeline, CoolkitDevicesRepository  # noqa: E402
+from coolkit_client.device import CoolkitDevice  # noqa: E402
+from coolkit_client.replay import CoolkitReplayer  # noqa: E402
+
+OUTLETS = 4
+
+
+def build_device(index: int) -> CoolkitDevice:
+    return CoolkitDevice({
+        'deviceid': '1000%06d' % index,
+        'devicekey': 'bench-key-%d' % index,
+        'brandName': 'SONOFF',
+        'name': 'bench %d' % index,
+        'productModel': '4CHPROR3',
+        'params': {'switches': [{'switch': 'off', 'outlet': i} for i in range(0, OUTLETS)]},
+    })
+
+
+def build_properties(device: CoolkitDevice, round_index: int) -> dict:
+    """Encrypted TXT properties, split in 249 bytes chunks like the devices do"""
+    params = {
+        'switches': [{'switch': 'on' if (round_index + i) % 2 else 'off', 'outlet': i} for i in range(0, OUTLETS)],
+        'configure': [{'startup': 'off', 'outlet': i} for i in range(0, OUTLETS)],
+        'pulses': [{'pulse': 'off', 'width': 1000, 'outlet': i} for i in range(0, OUTLETS)],
+        'sledOnline': 'on',
+        'fwVersion': '3.5.0',
+    }
+    message = device.client._encrypt_message({'data': json.dumps(params)})
+
+    data = message['data'].encode('utf-8')
+    properties = {b'encrypt': b'true', b'iv': message['iv'].encode('utf-8')}
+    for i in range(0, len(data), 249):
+        properties[('data' + str(i // 249 + 1)).encode('utf-8')] = data[i:i + 249]
+
+    return properties
+
+
+def build_capture(path: str, devices_count: int, rounds: int) -> None:
+    devices = [build_device(i) for i in range(0, devices_count)]
+    for device in devices:
+        CoolkitDevicesRepository.add_device(device)
+
+    CoolkitCapture.start(path)
+    for round_index in range(0, rounds):
+        for device in devices:
+            CoolkitCapture.record(CoolkitCapture.EVENT_TXT, {
+                'name': 'eWeLink_' + device.device_id + '._ewelink._tcp.local.',
+                'properties': CoolkitCapture.encode_properties(build_properties(device, round_index))
+            })
+    CoolkitCapture.stop()
+
+    CoolkitDevicesRepository.get_devices().clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--capture', help='Keep the generated capture at this path')
+    args = parser.parse_args()
+
+    path = args.capture or os.path.join(tempfile.mkdtemp(), 'reannounce.jsonl.gz')
+    build_capture(path, args.devices, args.rounds)
+
+    stats = CoolkitReplayer.replay(path, realtime=False)
+    CoolkitDecodePipeline.stop()
+
+    print('replay: ' + json.dumps(stats))
+    print('pipeline: ' + json.dumps(CoolkitDecodePipeline.get_stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Config flow for sonoff"""
+import json
+
+import voluptuous as vol
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.core import callback
+
+from . import DOMAIN, CONF_REGION, CONF_KNOWN_DEVICES
+
+
+class SonoffConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Single instance flow, the client keeps one session and one devices registry per process"""
+    VERSION = 1
+    CONNECTION_CLASS = config_entries.CONN_CLASS_LOCAL_PUSH
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return SonoffOptionsFlow(config_entry)
+
+    async def async_step_user(self, user_input=None):
+        from .coolkit_client import CoolkitSession
+
+        if self._async_current_entries():
+            return self.async_abort(reason='single_instance_allowed')
+
+        errors = {}
+
+        if user_input is not None:
+            await self.async_set_unique_id(user_input[CONF_USERNAME])
+
+            if await CoolkitSession.validate_credentials(
+                user_input[CONF_USERNAME],
+                user_input[CONF_PASSWORD],
+                user_input[CONF_REGION]
+            ):
+                return self.async_create_entry(title=user_input[CONF_USERNAME], data=user_input)
+
+            errors['base'] = 'invalid_auth'
+
+        return self.async_show_form(
+            step_id='user',
+            data_schema=vol.Schema({
+                vol.Required(CONF_USERNAME): str,
+                vol.Required(CONF_PASSWORD): str,
+                vol.Optional(CONF_REGION, default='eu'): str,
+            }),
+            errors=errors
+        )
+
+    async def async_step_import(self, import_config: dict):
+        """Import YAML configuration, an existing entry is updated and reloaded"""
+        entries = self._async_current_entries()
+        if entries:
+            if dict(entries[0].data) != import_config:
+                self.hass.config_entries.async_update_entry(
+                    entries[0],
+                    title=import_config[CONF_USERNAME],
+                    data=import_config
+                )
+
+            return self.async_abort(reason='already_configured')
+
+        await self.async_set_unique_id(import_config[CONF_USERNAME])
+
+        return self.async_create_entry(title=import_config[CONF_USERNAME], data=import_config)
+
+
+class SonoffOptionsFlow(config_entries.OptionsFlow):
+    """Edit credentials and known devices, the entry is updated and reloaded without a restart"""
+
+    def __init__(self, config_entry):
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        from .coolkit_client import CoolkitSession
+
+        data = self.config_entry.data
+        errors = {}
+
+        if user_input is not None:
+            try:
+                known_devices = json.loads(user_input.get(CONF_KNOWN_DEVICES) or '{}')
+            except ValueError:
+                known_devices = None
+
+            if not isinstance(known_devices, dict):
+                errors['base'] = 'invalid_known_devices'
+            elif await CoolkitSession.validate_credentials(
+                user_input[CONF_USERNAME],
+                user_input[CONF_PASSWORD],
+                user_input[CONF_REGION]
+            ):
+                new_data = dict(data)
+                new_data.update({
+                    CONF_USERNAME: user_input[CONF_USERNAME],
+                    CONF_PASSWORD: user_input[CONF_PASSWORD],
+                    CONF_REGION: user_input[CONF_REGION],
+                    CONF_KNOWN_DEVICES: known_devices,
+                })
+
+                # The update listener reloads the entry with the new data
+                self.hass.config_entries.async_update_entry(
+                    self.config_entry,
+                    title=user_input[CONF_USERNAME],
+                    data=new_data
+                )
+
+                return self.async_create_entry(title='', data={})
+            else:
+                errors['base'] = 'invalid_auth'
+
+        return self.async_show_form(
+            step_id='init',
+            data_schema=vol.Schema({
+                vol.Required(CONF_USERNAME, default=data.get(CONF_USERNAME, '')): str,
+                vol.Required(CONF_PASSWORD, default=data.get(CONF_PASSWORD, '')): str,
+                vol.Optional(CONF_REGION, default=data.get(CONF_REGION, 'eu')): str,
+                vol.Optional(CONF_KNOWN_DEVICES, default=json.dumps(data.get(CONF_KNOWN_DEVICES) or {})): str,
+            }),
+            errors=errors
+        )
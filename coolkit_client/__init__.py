@@ -1,4 +1,9 @@
 from .log import *
+from .capture import *
+from .decoder import *
 from .devices_repository import *
 from .session import *
 from .discover import *
+from .scheduler import *
+from .bulk import *
+from .runtime import *
@@ -0,0 +1,45 @@
+"""Bulk commands across devices"""
+import asyncio
+import time
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+from .log import Log
+
+if TYPE_CHECKING:
+    from .device import CoolkitDevice, CoolkitDeviceSwitch
+
+
+class CoolkitBulkCommands:
+    MAX_CONCURRENCY: int = 32
+
+    @classmethod
+    async def set_switches(
+            cls,
+            targets: List[Tuple['CoolkitDeviceSwitch', bool]],
+            max_concurrency: int = MAX_CONCURRENCY
+    ) -> Dict[str, dict]:
+        """
+        Group switch targets per device, send one command per device concurrently and
+        return success and latency by device id
+        """
+        by_device: Dict['CoolkitDevice', Dict['CoolkitDeviceSwitch', dict]] = {}
+        for switch, state in targets:
+            by_device.setdefault(switch.device, {})[switch] = {'on': state}
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def send(device: 'CoolkitDevice', attributes: Dict['CoolkitDeviceSwitch', dict]) -> dict:
+            async with semaphore:
+                started_at = time.monotonic()
+                try:
+                    success = await device.send_components_attributes(attributes)
+                except Exception as ex:
+                    Log.error('Error while sending bulk command to ' + str(device) + ': ' + format(ex))
+                    success = False
+
+                return {'success': success, 'latency': round(time.monotonic() - started_at, 3)}
+
+        devices = list(by_device.keys())
+        results = await asyncio.gather(*[send(device, by_device[device]) for device in devices])
+
+        return {device.device_id: result for device, result in zip(devices, results)}
@@ -0,0 +1,118 @@
+"""Record and replay of LAN and cloud traffic"""
+import gzip
+import json
+import queue
+import threading
+import time
+from base64 import b64decode, b64encode
+from typing import Dict, Iterator, Optional, Tuple
+
+from .log import Log
+
+
+class CoolkitCapture:
+    """
+    Write timestamped raw events to a gzipped JSON lines file.
+    Each capture session starts with a session marker followed by the known devices, timestamps
+    are relative to the session start. Lines are written by a background thread, so recording
+    never blocks the event loop on file I/O.
+    Captures include device keys, keep them private.
+    """
+    EVENT_SESSION = 'session'
+    EVENT_DEVICE = 'device'
+    EVENT_SERVICE = 'service'
+    EVENT_TXT = 'txt'
+    EVENT_HTTP = 'http'
+    EVENT_WS = 'ws'
+
+    _queue: Optional[queue.SimpleQueue] = None
+    _writer: Optional[threading.Thread] = None
+    _started_at: float = None
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def start(cls, path: str) -> None:
+        from .devices_repository import CoolkitDevicesRepository
+
+        with cls._lock:
+            if cls._queue is not None:
+                return
+
+            capture = gzip.open(path, 'at', encoding='utf-8')
+            cls._queue = queue.SimpleQueue()
+            cls._started_at = time.monotonic()
+            cls._writer = threading.Thread(
+                target=cls._write,
+                args=(capture, cls._queue),
+                name='coolkit-capture',
+                daemon=True
+            )
+            cls._writer.start()
+            Log.info('Capturing traffic to ' + path)
+
+        cls.record(cls.EVENT_SESSION, {'time': time.time()})
+        for device in list(CoolkitDevicesRepository.get_devices().values()):
+            cls.record_device(device.payload)
+
+    @classmethod
+    def stop(cls) -> None:
+        with cls._lock:
+            capture_queue = cls._queue
+            writer = cls._writer
+            cls._queue = None
+            cls._writer = None
+
+        if capture_queue is not None:
+            capture_queue.put(None)
+            writer.join()
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._queue is not None
+
+    @classmethod
+    def _write(cls, capture, capture_queue: queue.SimpleQueue) -> None:
+        try:
+            while True:
+                line = capture_queue.get()
+                if line is None:
+                    return
+
+                capture.write(line + '\n')
+        finally:
+            capture.close()
+
+    @classmethod
+    def record(cls, event: str, data: dict) -> None:
+        capture_queue = cls._queue
+        if capture_queue is None:
+            return
+
+        timestamp = round(time.monotonic() - cls._started_at, 6)
+        capture_queue.put(json.dumps([timestamp, event, data], separators=(',', ':')))
+
+    @classmethod
+    def record_device(cls, payload: dict) -> None:
+        cls.record(cls.EVENT_DEVICE, {'device': payload})
+
+    @classmethod
+    def encode_properties(cls, properties: Dict[bytes, Optional[bytes]]) -> Dict[str, Optional[str]]:
+        return {
+            key.decode('utf-8'): None if value is None else b64encode(value).decode('utf-8')
+            for key, value in properties.items()
+        }
+
+    @classmethod
+    def decode_properties(cls, properties: Dict[str, Optional[str]]) -> Dict[bytes, Optional[bytes]]:
+        return {
+            key.encode('utf-8'): None if value is None else b64decode(value)
+            for key, value in properties.items()
+        }
+
+    @classmethod
+    def read(cls, path: str) -> Iterator[Tuple[float, str, dict]]:
+        with gzip.open(path, 'rt', encoding='utf-8') as capture:
+            for line in capture:
+                if line.strip():
+                    timestamp, event, data = json.loads(line)
+                    yield timestamp, event, data
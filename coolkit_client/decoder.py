@@ -0,0 +1,193 @@
+"""Bounded pipeline decoding LAN frames off the zeroconf threads"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+
+from .log import Log
+
+if TYPE_CHECKING:
+    from .device.client import CoolkitDeviceClient
+
+
+class CoolkitDecodePipeline:
+    """
+    Raw TXT frames are queued by device, decoded (AES + JSON) by a small thread pool and
+    dispatched in batches to the event loop.
+    A queued frame is superseded by a newer frame for the same device, as each TXT record
+    carries the whole device state. When the queue is full, producers wait for room and then
+    drop the oldest frame.
+    """
+    MAX_PENDING: int = 256
+    WORKERS: int = 4
+    PUT_TIMEOUT: float = 1.0
+
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _condition: threading.Condition = threading.Condition()
+    _pending: 'OrderedDict[str, Tuple[CoolkitDeviceClient, dict]]' = OrderedDict()
+    _in_flight: Set[str] = set()
+    _decoded: List[Tuple['CoolkitDeviceClient', dict]] = []
+    _dispatch_scheduled: bool = False
+    _dispatching: int = 0
+    _private_dispatch_lock: threading.Lock = threading.Lock()
+    _workers: List[threading.Thread] = []
+    _running: bool = False
+    _stats: dict = {'submitted': 0, 'superseded': 0, 'dropped': 0, 'decoded': 0, 'failed': 0, 'batches': 0}
+
+    @classmethod
+    def set_loop(cls, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Dispatch decoded frames to this loop instead of a private one"""
+        cls._loop = loop
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return dict(cls._stats)
+
+    @classmethod
+    def start(cls) -> None:
+        with cls._condition:
+            if cls._running:
+                return
+
+            cls._running = True
+            cls._workers = []
+            for i in range(0, cls.WORKERS):
+                worker = threading.Thread(target=cls._work, name='coolkit-decoder-' + str(i), daemon=True)
+                worker.start()
+                cls._workers.append(worker)
+
+    @classmethod
+    def stop(cls) -> None:
+        with cls._condition:
+            cls._running = False
+            cls._pending.clear()
+            cls._condition.notify_all()
+
+        for worker in cls._workers:
+            worker.join()
+
+        with cls._condition:
+            cls._workers = []
+            cls._in_flight.clear()
+            cls._decoded = []
+            cls._dispatch_scheduled = False
+            cls._dispatching = 0
+            cls._condition.notify_all()
+
+    @classmethod
+    def submit(cls, client: 'CoolkitDeviceClient', properties: dict) -> None:
+        """Queue a raw TXT frame, called from zeroconf threads"""
+        cls.start()
+
+        key = client.device_id
+        with cls._condition:
+            cls._stats['submitted'] += 1
+
+            if key in cls._pending:
+                cls._pending[key] = (client, properties)
+                cls._stats['superseded'] += 1
+                return
+
+            if len(cls._pending) >= cls.MAX_PENDING:
+                cls._condition.wait_for(lambda: len(cls._pending) < cls.MAX_PENDING, cls.PUT_TIMEOUT)
+
+                if key in cls._pending:
+                    cls._pending[key] = (client, properties)
+                    cls._stats['superseded'] += 1
+                    return
+
+                if len(cls._pending) >= cls.MAX_PENDING:
+                    dropped, _ = cls._pending.popitem(last=False)
+                    cls._stats['dropped'] += 1
+                    Log.warning('Decode queue full, dropping frame for device ' + dropped)
+
+            cls._pending[key] = (client, properties)
+            cls._condition.notify_all()
+
+    @classmethod
+    def join(cls, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued frame has been decoded and dispatched"""
+        with cls._condition:
+            return cls._condition.wait_for(
+                lambda: not cls._pending and not cls._in_flight and not cls._decoded and not cls._dispatching,
+                timeout
+            )
+
+    @classmethod
+    def _next_frame(cls) -> Optional[Tuple['CoolkitDeviceClient', dict]]:
+        """Pop the oldest frame of a device not being decoded, to keep per device ordering"""
+        for key in cls._pending.keys():
+            if key not in cls._in_flight:
+                cls._in_flight.add(key)
+                return cls._pending.pop(key)
+
+        return None
+
+    @classmethod
+    def _work(cls) -> None:
+        while True:
+            with cls._condition:
+                frame = None
+                while cls._running and frame is None:
+                    frame = cls._next_frame()
+                    if frame is None:
+                        cls._condition.wait()
+
+                if not cls._running:
+                    return
+
+                # Room was made for producers
+                cls._condition.notify_all()
+
+            client, properties = frame
+            data = client.decode_properties(properties)
+
+            with cls._condition:
+                cls._in_flight.discard(client.device_id)
+
+                if data is None:
+                    cls._stats['failed'] += 1
+                else:
+                    cls._stats['decoded'] += 1
+                    cls._decoded.append((client, data))
+
+                schedule = cls._decoded and not cls._dispatch_scheduled
+                if schedule:
+                    cls._dispatch_scheduled = True
+                    cls._dispatching += 1
+
+                cls._condition.notify_all()
+
+            if schedule:
+                cls._schedule_dispatch()
+
+    @classmethod
+    def _schedule_dispatch(cls) -> None:
+        loop = cls._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(lambda: loop.create_task(cls._dispatch()))
+        else:
+            with cls._private_dispatch_lock:
+                private_loop = asyncio.new_event_loop()
+                private_loop.run_until_complete(cls._dispatch())
+                private_loop.close()
+
+    @classmethod
+    async def _dispatch(cls) -> None:
+        """Apply every decoded frame collected so far as a single batch"""
+        with cls._condition:
+            batch = cls._decoded
+            cls._decoded = []
+            cls._dispatch_scheduled = False
+            cls._stats['batches'] += 1
+
+        try:
+            for client, data in batch:
+                try:
+                    await client.dispatch_message(data)
+                except Exception as ex:
+                    Log.error('Error while dispatching message for device ' + client.device_id + ': ' + format(ex))
+        finally:
+            with cls._condition:
+                cls._dispatching = max(0, cls._dispatching - 1)
+                cls._condition.notify_all()
@@ -0,0 +1,290 @@
+"""Declarative device capabilities"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class CoolkitCapabilityField:
+    """Map one device param to one or more component attributes"""
+
+    def __init__(
+            self,
+            param: str,
+            attributes: Tuple[str, ...],
+            decode: Callable[[Any], dict],
+            encode: Optional[Callable[[dict, Any], Any]] = None
+    ):
+        self.param = param
+        self.attributes = attributes
+        self.decode = decode
+        self.encode = encode
+
+    @classmethod
+    def scalar(
+            cls,
+            param: str,
+            attribute: str,
+            decode: Callable[[Any], Any] = None,
+            encode: Callable[[Any], Any] = None
+    ) -> 'CoolkitCapabilityField':
+        """Field holding a single value"""
+        decode = decode or (lambda value: value)
+        encode = encode or (lambda value: value)
+
+        return cls(
+            param,
+            (attribute,),
+            lambda value: {attribute: decode(value)},
+            lambda attributes, current: encode(attributes[attribute])
+        )
+
+    @classmethod
+    def nested(cls, param: str, mapping: Dict[str, str]) -> 'CoolkitCapabilityField':
+        """Field holding a dict, each key mapped to an attribute"""
+        def decode(value: Any) -> dict:
+            if not isinstance(value, dict):
+                return {}
+
+            return {mapping[key]: item for key, item in value.items() if key in mapping}
+
+        def encode(attributes: dict, current: Any) -> dict:
+            value = dict(current) if isinstance(current, dict) else {}
+            for key, attribute in mapping.items():
+                if attribute in attributes:
+                    value[key] = attributes[attribute]
+
+            return value
+
+        return cls(param, tuple(mapping.values()), decode, encode)
+
+
+class CoolkitCapability:
+    """Describe a component type and the params schema it is built from"""
+
+    def __init__(
+            self,
+            component: str,
+            command: str,
+            fields: Iterable[CoolkitCapabilityField],
+            uiids: Iterable[int] = (),
+            product_models: Iterable[str] = (),
+            detect: Iterable[str] = (),
+            exclude: Iterable[str] = (),
+            outlets: Optional[str] = None
+    ):
+        self.component = component
+        self.command = command
+        self.fields: Tuple[CoolkitCapabilityField, ...] = tuple(fields)
+        self.uiids = frozenset(uiids)
+        self.product_models = frozenset(product_models)
+        self.detect = frozenset(detect)
+        self.exclude = frozenset(exclude)
+        self.outlets = outlets
+
+        # Compiled once: param -> field and attribute -> fields
+        self.params = frozenset([self.outlets] if self.outlets else [field.param for field in self.fields])
+        self.attributes = frozenset(attribute for field in self.fields for attribute in field.attributes)
+        self._fields_by_param = {field.param: field for field in self.fields}
+        self._fields_by_attribute: Dict[str, List[CoolkitCapabilityField]] = {}
+        for field in self.fields:
+            for attribute in field.attributes:
+                self._fields_by_attribute.setdefault(attribute, []).append(field)
+
+    def matches(self, uiid: Optional[int], product_model: Optional[str], params: Iterable[str]) -> bool:
+        """Match by uiid, product model or detected params, never when an excluded param is present"""
+        if not self.exclude.isdisjoint(params):
+            return False
+
+        if uiid is not None and uiid in self.uiids:
+            return True
+
+        if product_model is not None and product_model in self.product_models:
+            return True
+
+        return bool(self.detect) and self.detect.issubset(params)
+
+    def count(self, params: dict) -> int:
+        """Number of components exposed by this capability"""
+        if self.outlets:
+            return len(params.get(self.outlets) or [])
+
+        return 1
+
+    def decode(self, param: str, value: Any) -> dict:
+        field = self._fields_by_param.get(param)
+        if field is None:
+            return {}
+
+        return field.decode(value)
+
+    def decode_outlets(self, entries: List[dict]) -> Dict[int, dict]:
+        """Decode a per-outlet list into attributes by outlet index"""
+        decoded = {}
+        for entry in entries:
+            attributes = {}
+            for param, value in entry.items():
+                attributes.update(self.decode(param, value))
+            decoded[int(entry['outlet'])] = attributes
+
+        return decoded
+
+    def encode(self, attributes: dict, params: dict, index: int = 0) -> dict:
+        """Build outgoing params from a params snapshot and the requested attributes"""
+        fields = []
+        for attribute in attributes.keys():
+            for field in self._fields_by_attribute.get(attribute, []):
+                if field.encode is not None and field not in fields:
+                    fields.append(field)
+
+        if self.outlets:
+            entries = params.get(self.outlets) or []
+            for entry in entries:
+                if int(entry['outlet']) == index:
+                    for field in fields:
+                        entry[field.param] = field.encode(attributes, entry.get(field.param))
+
+            return {self.outlets: entries}
+
+        return {field.param: field.encode(attributes, params.get(field.param)) for field in fields}
+
+
+def _is_on(value: Any) -> bool:
+    return value == 'on'
+
+
+def _on_off(value: bool) -> str:
+    return 'on' if value else 'off'
+
+
+SWITCH_FIELD = CoolkitCapabilityField.scalar('switch', 'on', _is_on, _on_off)
+
+# Order matters: specific capabilities first, params already claimed are not matched again
+CAPABILITIES: List[CoolkitCapability] = [
+    CoolkitCapability(
+        component='rf_bridge',
+        command='transmit',
+        uiids=[28],
+        detect=['rfList'],
+        fields=[
+            CoolkitCapabilityField.scalar(
+                'rfList', 'channels',
+                lambda value: [int(item['rfChl']) for item in value or []]
+            ),
+            CoolkitCapabilityField.scalar('cmd', 'command'),
+            CoolkitCapabilityField.scalar('rfChl', 'channel', int, int),
+        ]
+    ),
+    CoolkitCapability(
+        component='cover',
+        command='curtain',
+        uiids=[11],
+        detect=['setclose'],
+        fields=[
+            CoolkitCapabilityField.scalar('switch', 'motion'),
+            CoolkitCapabilityField.scalar(
+                'setclose', 'position',
+                lambda value: 100 - int(value),
+                lambda value: 100 - int(value)
+            ),
+        ]
+    ),
+    CoolkitCapability(
+        component='light',
+        command='light',
+        uiids=[103, 104],
+        detect=['ltype'],
+        fields=[
+            SWITCH_FIELD,
+            CoolkitCapabilityField.scalar('ltype', 'mode'),
+            CoolkitCapabilityField.nested('white', {'br': 'brightness', 'ct': 'color_temp'}),
+            CoolkitCapabilityField.nested(
+                'color', {'br': 'color_brightness', 'r': 'red', 'g': 'green', 'b': 'blue'}
+            ),
+        ]
+    ),
+    CoolkitCapability(
+        component='light',
+        command='light',
+        uiids=[59],
+        detect=['colorR', 'colorG', 'colorB'],
+        fields=[
+            SWITCH_FIELD,
+            CoolkitCapabilityField.scalar('bright', 'brightness', int, int),
+            CoolkitCapabilityField.scalar('colorR', 'red', int, int),
+            CoolkitCapabilityField.scalar('colorG', 'green', int, int),
+            CoolkitCapabilityField.scalar('colorB', 'blue', int, int),
+        ]
+    ),
+    CoolkitCapability(
+        component='light',
+        command='dimmable',
+        uiids=[44],
+        detect=['switch', 'brightness'],
+        fields=[
+            SWITCH_FIELD,
+            CoolkitCapabilityField.scalar('brightness', 'brightness', int, int),
+        ]
+    ),
+    CoolkitCapability(
+        component='light',
+        command='dimmable',
+        uiids=[36],
+        detect=['switch', 'bright'],
+        fields=[
+            SWITCH_FIELD,
+            CoolkitCapabilityField.scalar('bright', 'brightness', int, int),
+        ]
+    ),
+    CoolkitCapability(
+        component='switch',
+        command='switches',
+        detect=['switches'],
+        outlets='switches',
+        fields=[SWITCH_FIELD]
+    ),
+    CoolkitCapability(
+        component='switch',
+        command='switch',
+        detect=['switch'],
+        exclude=['switches'],
+        fields=[SWITCH_FIELD]
+    ),
+]
+
+
+class CoolkitCompiledCapabilities:
+    """Capabilities matched for one params schema, with a param -> capabilities decoder map"""
+
+    def __init__(self, capabilities: List[CoolkitCapability]):
+        self.capabilities = capabilities
+        self.decoders: Dict[str, List[CoolkitCapability]] = {}
+        for capability in capabilities:
+            for param in capability.params:
+                self.decoders.setdefault(param, []).append(capability)
+
+
+class CoolkitCapabilities:
+    _compiled: Dict[tuple, CoolkitCompiledCapabilities] = {}
+
+    @classmethod
+    def compile(
+            cls,
+            uiid: Optional[int],
+            product_model: Optional[str],
+            params: dict
+    ) -> CoolkitCompiledCapabilities:
+        """Match capabilities for a device, cached by uiid, model and params schema"""
+        key = (uiid, product_model, frozenset(params.keys()))
+        if key not in cls._compiled:
+            claimed = set()
+            matched = []
+
+            for capability in CAPABILITIES:
+                if capability.params & claimed:
+                    continue
+
+                if capability.matches(uiid, product_model, params.keys()):
+                    matched.append(capability)
+                    claimed.update(capability.params)
+
+            cls._compiled[key] = CoolkitCompiledCapabilities(matched)
+
+        return cls._compiled[key]
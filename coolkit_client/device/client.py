@@ -18,6 +18,8 @@ from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad, pad
 from zeroconf import Zeroconf, ServiceBrowser
 
+from ..capture import CoolkitCapture
+from ..decoder import CoolkitDecodePipeline
 from ..log import Log
 
 if TYPE_CHECKING:
@@ -25,16 +27,15 @@ if TYPE_CHECKING:
 
 
 class CoolkitDeviceClient:
-    COMMAND_SWITCHES_PATH = '/zeroconf/switches'
-    COMMAND_SWITCH_PATH = '/zeroconf/switch'
+    COMMAND_PATH = '/zeroconf/'
 
     _service_browser: ServiceBrowser = None
     _encrypted: bool = False
-    _send_lock: asyncio.Lock = asyncio.Lock()
 
     def __init__(self, device: 'CoolkitDevice'):
         self._device = device
-        self._http_session = aiohttp.ClientSession()
+        self._send_lock = asyncio.Lock()
+        self._http_session: Optional[aiohttp.ClientSession] = None
 
     async def send(self, url: str, params: dict) -> Optional[dict]:
         if self._device.control_url is None:
@@ -56,9 +57,17 @@ class CoolkitDeviceClient:
 
                 request = json.dumps(payload)
 
+                if self._http_session is None or self._http_session.closed:
+                    self._http_session = aiohttp.ClientSession()
+
                 response = await self._http_session.post(self._device.control_url + url, data=request)
                 json_res = await response.json()
 
+                CoolkitCapture.record(CoolkitCapture.EVENT_HTTP, {
+                    'method': 'POST', 'url': self._device.control_url + url, 'request': request,
+                    'status': response.status, 'response': json_res
+                })
+
                 if json_res.get('error') != 0:
                     Log.error('Error while sending command to device')
                     return None
@@ -69,11 +78,8 @@ class CoolkitDeviceClient:
 
         return None
 
-    async def send_switch_command(self, params: dict) -> bool:
-        if self._device.is_multi_switch_device:
-            return (await self.send(self.COMMAND_SWITCHES_PATH, params)) is not None
-
-        return (await self.send(self.COMMAND_SWITCH_PATH, params)) is not None
+    async def send_command(self, command: str, params: dict) -> bool:
+        return (await self.send(self.COMMAND_PATH + command, params)) is not None
 
     def _encrypt_message(self, data: dict) -> dict:
         iv = get_random_bytes(16)
@@ -113,64 +119,78 @@ class CoolkitDeviceClient:
         except Exception as ex:
             Log.error('Error decrypting for device ' + self._device.device_id + ': ' + format(ex))
 
-    def handle_encrypted_message(self, message: bytes, iv: bytes) -> None:
-        """Handle update message in encrypted form"""
-        decrypted_message = self._decrypt_message(message, iv)
-        self.handle_message(decrypted_message)
-
-    def handle_message(self, message: bytes) -> None:
-        """Handle update message"""
-        data = json.loads(message.decode('utf-8'))
-        self._device.params = data
-
-        if data.get('switch'):
-            self._handle_message_switch(data)
-        elif data.get('switches'):
-            self._handle_message_switches(data)
-
-    def _handle_message_switch(self, data: dict) -> None:
-        """Update device with a single outlet"""
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(self._device.switches[0].update_state(data['switch'] == 'on'))
-        loop.close()
-
-    def _handle_message_switches(self, data: dict) -> None:
-        """Update device with multiple outlets"""
-
-        loop = asyncio.new_event_loop()
-        for switch in data['switches']:
-            index = int(switch['outlet'])
-            loop.run_until_complete(self._device.switches[index].update_state(switch['switch'] == 'on'))
-        loop.close()
-        
-    def start_service_browser(self, zeroconf: Zeroconf, name: str) -> None:
-        Log.debug('Start service browser for ' + str(self._device))
-        self._service_browser = ServiceBrowser(zeroconf, name, listener=self)
-
-    def update_service(self, zeroconf: Zeroconf, type: str, name: str) -> None:
-        info = zeroconf.get_service_info(type, name)
+    def decode_message(self, message: bytes) -> Optional[dict]:
+        """Decode update message"""
+        try:
+            return json.loads(message.decode('utf-8'))
+        except Exception as ex:
+            Log.error('Error decoding message for device ' + self._device.device_id + ': ' + format(ex))
 
-        if info.properties.get(b'encrypt'):
-            iv = info.properties.get(b'iv')
-            data1 = info.properties.get(b'data1')
+    def decode_properties(self, properties: dict) -> Optional[dict]:
+        """Decode TXT record properties, in plain or encrypted form"""
+        if properties.get(b'encrypt'):
+            iv = properties.get(b'iv')
+            data1 = properties.get(b'data1')
 
             if len(data1) == 249:
-                data2 = info.properties.get(b'data2')
+                data2 = properties.get(b'data2')
                 data1 += data2
 
                 if len(data2) == 249:
-                    data3 = info.properties.get(b'data3')
+                    data3 = properties.get(b'data3')
                     data1 += data3
 
                     if len(data3) == 249:
-                        data4 = info.properties.get(b'data4')
+                        data4 = properties.get(b'data4')
                         data1 += data4
 
-            self.handle_encrypted_message(bytes(data1), bytes(iv))
-            self._encrypted = True
+            message = self._decrypt_message(bytes(data1), bytes(iv))
+            if message is None:
+                return None
+
+            return self.decode_message(message)
+
+        return self.decode_message(bytes(properties.get(b'data1')))
+
+    async def dispatch_message(self, data: dict) -> None:
+        """Handle decoded update message"""
+        await self._device.update_params(data)
+
+    def start_service_browser(self, zeroconf: Zeroconf, name: str) -> None:
+        if self._service_browser is not None:
+            return
+
+        Log.debug('Start service browser for ' + str(self._device))
+        self._service_browser = ServiceBrowser(zeroconf, name, listener=self)
+
+    def stop_service_browser(self) -> None:
+        if self._service_browser is not None:
+            Log.debug('Stop service browser for ' + str(self._device))
+            self._service_browser.cancel()
+            self._service_browser = None
+
+    async def close(self) -> None:
+        """Stop LAN updates and close the HTTP session"""
+        self.stop_service_browser()
+
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    def update_service(self, zeroconf: Zeroconf, type: str, name: str) -> None:
+        info = zeroconf.get_service_info(type, name)
+
+        CoolkitCapture.record(CoolkitCapture.EVENT_TXT, {
+            'name': name, 'properties': CoolkitCapture.encode_properties(info.properties)
+        })
+
+        self.handle_properties(info.properties)
 
-        else:
-            data = info.properties.get(b'data1')
-            self.handle_message(bytes(data))
-            self._encrypted = False
+    def handle_properties(self, properties: dict) -> None:
+        """Handle TXT record properties, decoding is queued on the decode pipeline"""
+        self._encrypted = bool(properties.get(b'encrypt'))
+        CoolkitDecodePipeline.submit(self, properties)
 
+    @property
+    def device_id(self) -> str:
+        return self._device.device_id
@@ -0,0 +1,56 @@
+"""Component base"""
+from typing import TYPE_CHECKING, Any, Callable, Dict, Awaitable
+
+if TYPE_CHECKING:
+    from .capabilities import CoolkitCapability
+    from .device import CoolkitDevice
+
+
+class CoolkitDeviceComponent:
+    def __init__(self, device: 'CoolkitDevice', capability: 'CoolkitCapability', index: int):
+        self._index = index
+        self._device = device
+        self._capability = capability
+        self._attributes: Dict[str, Any] = {}
+        self._callbacks: Dict[str, Callable[['CoolkitDeviceComponent', dict], Awaitable[None]]] = {}
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def device(self) -> 'CoolkitDevice':
+        return self._device
+
+    @property
+    def capability(self) -> 'CoolkitCapability':
+        return self._capability
+
+    def get_attribute(self, name: str, default: Any = None) -> Any:
+        return self._attributes.get(name, default)
+
+    def load_attributes(self, attributes: dict) -> None:
+        """Set attributes without notifying callbacks"""
+        self._attributes.update(attributes)
+
+    async def update_attributes(self, attributes: dict) -> None:
+        changed = {name: value for name, value in attributes.items() if self._attributes.get(name) != value}
+
+        if changed:
+            self._attributes.update(changed)
+            for callback in list(self._callbacks.values()):
+                await callback(self, changed)
+
+    def add_state_callback(
+            self,
+            callback_name: str,
+            callable: Callable[['CoolkitDeviceComponent', dict], Awaitable[None]]
+    ) -> None:
+        self._callbacks[callback_name] = callable
+
+    def remove_callback(self, callback_name: str) -> None:
+        if callback_name in self._callbacks:
+            del self._callbacks[callback_name]
+
+    async def set_attributes(self, attributes: dict) -> bool:
+        return await self._device.send_components_attributes({self: attributes})
@@ -0,0 +1,23 @@
+"""Component cover"""
+from typing import Optional
+
+from .component import CoolkitDeviceComponent
+
+
+class CoolkitDeviceCover(CoolkitDeviceComponent):
+    @property
+    def position(self) -> Optional[int]:
+        """Position in percent, 100 is fully open"""
+        return self.get_attribute('position')
+
+    async def open(self) -> bool:
+        return await self.set_attributes({'motion': 'on'})
+
+    async def close(self) -> bool:
+        return await self.set_attributes({'motion': 'off'})
+
+    async def stop(self) -> bool:
+        return await self.set_attributes({'motion': 'pause'})
+
+    async def set_position(self, position: int) -> bool:
+        return await self.set_attributes({'position': position})
@@ -1,18 +1,36 @@
 """Devices object"""
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict, Optional, Callable, Awaitable, Any
 
+from .capabilities import CoolkitCapabilities
+from ..log import Log
 from .client import CoolkitDeviceClient
+from .component import CoolkitDeviceComponent
+from .cover import CoolkitDeviceCover
+from .light import CoolkitDeviceLight
+from .params import CoolkitDeviceParams
+from .rf_bridge import CoolkitDeviceRfBridge
 from .switch import CoolkitDeviceSwitch
 
 
 class CoolkitDevice:
     SERVICE_TYPE = "_ewelink._tcp.local."
 
+    COMPONENT_CLASSES = {
+        'switch': CoolkitDeviceSwitch,
+        'light': CoolkitDeviceLight,
+        'cover': CoolkitDeviceCover,
+        'rf_bridge': CoolkitDeviceRfBridge,
+    }
+
     def __init__(self, payload: dict):
         self._ip = None
         self._port = None
         self._payload = payload
-        self._switches: List[CoolkitDeviceSwitch] = []
+        self._params = CoolkitDeviceParams(payload.get('params'))
+        self._params_callbacks: Dict[str, Dict[str, Callable[[Any], Awaitable[None]]]] = {}
+        self._components: Dict[str, List[CoolkitDeviceComponent]] = {}
+        self._state_change_lock = asyncio.Lock()
         self._populate_components()
         self._client = CoolkitDeviceClient(device=self)
 
@@ -23,27 +41,136 @@ class CoolkitDevice:
         return self._payload[param]
 
     def _populate_components(self) -> None:
-        if 'switch' in self.params:
-            self._switches.append(CoolkitDeviceSwitch(self, 0))
-        elif 'switches' in self.params:
-            for i in range(0, len(self.params['switches'])):
-                self._switches.append(CoolkitDeviceSwitch(self, i))
+        params = self._params.snapshot()
+        self._capabilities = CoolkitCapabilities.compile(self.uiid, self.product_model, params)
+
+        for capability in self._capabilities.capabilities:
+            components = self._components.setdefault(capability.component, [])
+            for i in range(0, capability.count(params)):
+                components.append(self.COMPONENT_CLASSES[capability.component](self, capability, i))
+
+        self._components_by_capability = {
+            capability: [
+                component
+                for component in self._components[capability.component]
+                if component.capability is capability
+            ]
+            for capability in self._capabilities.capabilities
+        }
+
+        for component, attributes in self._decode_params(params).items():
+            component.load_attributes(attributes)
+
+    def _decode_params(self, params: dict) -> Dict[CoolkitDeviceComponent, dict]:
+        """Decode params in a single pass, collecting attributes per component"""
+        updates: Dict[CoolkitDeviceComponent, dict] = {}
+        for param, value in params.items():
+            for capability in self._capabilities.decoders.get(param, ()):
+                components = self._components_by_capability[capability]
+
+                if capability.outlets:
+                    for index, attributes in capability.decode_outlets(value).items():
+                        if index < len(components):
+                            updates.setdefault(components[index], {}).update(attributes)
+                elif components:
+                    updates.setdefault(components[0], {}).update(capability.decode(param, value))
+
+        return updates
+
+    def add_params_callback(
+            self,
+            param: str,
+            callback_name: str,
+            callable: Callable[[Any], Awaitable[None]]
+    ) -> None:
+        """Register a callback invoked with the new value when a param changes"""
+        self._params_callbacks.setdefault(param, {})[callback_name] = callable
+
+    def remove_params_callback(self, param: str, callback_name: str) -> None:
+        if callback_name in self._params_callbacks.get(param, {}):
+            del self._params_callbacks[param][callback_name]
+
+    async def update_params(self, data: dict) -> dict:
+        """Apply a partial params update and dispatch changed fields only"""
+        diff = self._params.update(data)
+
+        for component, attributes in self._decode_params(diff).items():
+            await component.update_attributes(attributes)
+
+        for param, value in diff.items():
+            for callback in list(self._params_callbacks.get(param, {}).values()):
+                await callback(value)
+
+        return diff
+
+    async def send_components_attributes(self, attributes: Dict[CoolkitDeviceComponent, dict]) -> bool:
+        """Send attributes of one or more components of the same capability as a single command"""
+        capabilities = set(component.capability for component in attributes.keys())
+        if len(capabilities) != 1:
+            raise ValueError('Components of a single capability must be sent at once')
+
+        capability = capabilities.pop()
+
+        # A lock is required to avoid state inconsistencies on multi outlet devices
+        async with self._state_change_lock:
+            params = self.params
+            new_params = {}
+            for component, component_attributes in attributes.items():
+                encoded = capability.encode(component_attributes, params, component.index)
+                params.update(encoded)
+                new_params.update(encoded)
+
+            Log.info('Sending ' + str(self) + ' ' + capability.command + ' = ' + str(new_params))
+
+            if await self.client.send_command(capability.command, new_params):
+                await self.update_params(new_params)
+                return True
+
+        return False
+
+    def remove_callbacks(self, callback_name: str) -> None:
+        """Remove a named callback from every component and param"""
+        for components in self._components.values():
+            for component in components:
+                component.remove_callback(callback_name)
+
+        for param in list(self._params_callbacks.keys()):
+            self.remove_params_callback(param, callback_name)
+
+    async def close(self) -> None:
+        await self._client.close()
 
     @property
-    def is_multi_switch_device(self) -> bool:
-        return len(self.switches) > 1
+    def components(self) -> Dict[str, List[CoolkitDeviceComponent]]:
+        return self._components
 
     @property
     def switches(self) -> List[CoolkitDeviceSwitch]:
-        return self._switches
+        return self._components.get('switch', [])
+
+    @property
+    def lights(self) -> List[CoolkitDeviceLight]:
+        return self._components.get('light', [])
+
+    @property
+    def covers(self) -> List[CoolkitDeviceCover]:
+        return self._components.get('cover', [])
+
+    @property
+    def rf_bridges(self) -> List[CoolkitDeviceRfBridge]:
+        return self._components.get('rf_bridge', [])
 
     @property
     def params(self) -> dict:
-        return self.get_info('params')
+        """Detached snapshot of current params"""
+        return self._params.snapshot()
 
-    @params.setter
-    def params(self, params: Dict) -> None:
-        self._payload['params'] = params
+    @property
+    def payload(self) -> dict:
+        """Device payload with current params"""
+        payload = dict(self._payload)
+        payload['params'] = self._params.snapshot()
+        return payload
 
     @property
     def api_key(self) -> str:
@@ -65,6 +192,11 @@ class CoolkitDevice:
     def device_model(self) -> str:
         return self.get_info('extra')['extra']['model']
 
+    @property
+    def uiid(self) -> Optional[int]:
+        extra = self.get_info('extra') or {}
+        return (extra.get('extra') or {}).get('uiid')
+
     @property
     def product_model(self) -> str:
         return self.get_info('productModel')
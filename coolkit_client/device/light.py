@@ -0,0 +1,47 @@
+"""Component light"""
+from typing import Optional, Tuple
+
+from .component import CoolkitDeviceComponent
+
+
+class CoolkitDeviceLight(CoolkitDeviceComponent):
+    def get_state(self) -> bool:
+        return self.get_attribute('on', False)
+
+    @property
+    def supports_color(self) -> bool:
+        return 'red' in self._capability.attributes
+
+    @property
+    def brightness(self) -> Optional[int]:
+        """Brightness in percent"""
+        if self.get_attribute('mode') == 'color':
+            return self.get_attribute('color_brightness')
+
+        return self.get_attribute('brightness')
+
+    @property
+    def rgb(self) -> Optional[Tuple[int, int, int]]:
+        if self.get_attribute('red') is None:
+            return None
+
+        return self.get_attribute('red'), self.get_attribute('green'), self.get_attribute('blue')
+
+    async def turn_on(self, brightness: Optional[int] = None, rgb: Optional[Tuple[int, int, int]] = None) -> bool:
+        attributes = {'on': True}
+
+        if rgb is not None:
+            attributes.update({'red': rgb[0], 'green': rgb[1], 'blue': rgb[2]})
+            if 'mode' in self._capability.attributes:
+                attributes['mode'] = 'color'
+
+        if brightness is not None:
+            if self.get_attribute('mode') == 'color' or attributes.get('mode') == 'color':
+                attributes['color_brightness'] = brightness
+            else:
+                attributes['brightness'] = brightness
+
+        return await self.set_attributes(attributes)
+
+    async def turn_off(self) -> bool:
+        return await self.set_attributes({'on': False})
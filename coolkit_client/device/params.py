@@ -0,0 +1,73 @@
+"""Device params store"""
+from copy import deepcopy
+from typing import Any, Dict, List
+
+
+class CoolkitDeviceParams:
+    """Keep device params and compute field-level changes on partial updates"""
+
+    # Params holding a list of per-outlet entries, merged by their outlet index
+    OUTLET_LIST_PARAMS = ('switches', 'configure', 'pulses')
+
+    def __init__(self, params: dict = None):
+        self._params: Dict[str, Any] = deepcopy(params) if params else {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._params
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a copy of a single param"""
+        if key not in self._params:
+            return default
+
+        return deepcopy(self._params[key])
+
+    def snapshot(self) -> dict:
+        """Get a detached copy of current params, safe to be changed for outgoing commands"""
+        return deepcopy(self._params)
+
+    def update(self, data: dict) -> dict:
+        """Apply a partial update and return changed fields only"""
+        diff = {}
+
+        for key, value in data.items():
+            if key in self.OUTLET_LIST_PARAMS and isinstance(value, list):
+                changed = self._update_outlets(key, value)
+                if changed:
+                    diff[key] = changed
+            elif key not in self._params or self._params[key] != value:
+                self._params[key] = deepcopy(value)
+                diff[key] = deepcopy(value)
+
+        return diff
+
+    def _update_outlets(self, key: str, entries: List[dict]) -> List[dict]:
+        """Merge outlet entries by outlet index and return changed entries only"""
+        current = self._params.get(key)
+        if not isinstance(current, list):
+            current = []
+            self._params[key] = current
+
+        by_outlet = {}
+        for entry in current:
+            if isinstance(entry, dict) and 'outlet' in entry:
+                by_outlet[int(entry['outlet'])] = entry
+
+        changed = []
+        for entry in entries:
+            if not isinstance(entry, dict) or 'outlet' not in entry:
+                continue
+
+            outlet = int(entry['outlet'])
+            old_entry = by_outlet.get(outlet)
+
+            if old_entry is None:
+                new_entry = deepcopy(entry)
+                current.append(new_entry)
+                by_outlet[outlet] = new_entry
+                changed.append(deepcopy(new_entry))
+            elif any(old_entry.get(k) != v for k, v in entry.items()):
+                old_entry.update(deepcopy(entry))
+                changed.append(deepcopy(old_entry))
+
+        return changed
@@ -0,0 +1,19 @@
+"""Component RF bridge"""
+from typing import List, Optional
+
+from .component import CoolkitDeviceComponent
+
+
+class CoolkitDeviceRfBridge(CoolkitDeviceComponent):
+    @property
+    def channels(self) -> List[int]:
+        """Learned RF channels"""
+        return self.get_attribute('channels', [])
+
+    @property
+    def last_channel(self) -> Optional[int]:
+        """Last channel transmitted or received"""
+        return self.get_attribute('channel')
+
+    async def transmit(self, channel: int) -> bool:
+        return await self.set_attributes({'command': 'transmit', 'channel': channel})
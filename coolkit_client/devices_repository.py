@@ -2,6 +2,8 @@
 from typing import Dict, Optional
 from typing import TYPE_CHECKING
 
+from .capture import CoolkitCapture
+
 if TYPE_CHECKING:
     from .device import CoolkitDevice
 
@@ -27,3 +29,19 @@ class CoolkitDevicesRepository:
     @classmethod
     def add_device(cls, device: 'CoolkitDevice') -> None:
         cls._devices[device.device_id] = device
+
+        if CoolkitCapture.is_enabled():
+            CoolkitCapture.record_device(device.payload)
+
+    @classmethod
+    def remove_device(cls, device_id: str) -> Optional['CoolkitDevice']:
+        return cls._devices.pop(device_id, None)
+
+    @classmethod
+    async def clear(cls) -> None:
+        """Close and forget every device"""
+        devices = list(cls._devices.values())
+        cls._devices.clear()
+
+        for device in devices:
+            await device.close()
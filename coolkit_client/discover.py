@@ -1,93 +1,176 @@
 import asyncio
 import re
 import socket
-from threading import Thread
-from typing import Optional
+from threading import Event, Thread
+from typing import Dict, List, Optional
 
-from aiohttp import ClientSession
 from zeroconf import ServiceBrowser, Zeroconf
 
+from .capture import CoolkitCapture
 from .devices_repository import CoolkitDevicesRepository
 from .device import CoolkitDevice
 from .log import Log
+from .scheduler import CoolkitRequestScheduler
 from .session import CoolkitSession
 
 
 class CoolkitDevicesDiscovery:
-    @classmethod
-    async def discover(cls, known_devices: dict) -> bool:
-        devices_endpoint = CoolkitSession.get_api_endpoint_url('api/user/device')
+    DAEMON_INTERVAL: int = 60
 
-        async with ClientSession(headers=CoolkitSession.get_auth_headers()) as session:
-            async with session.get(devices_endpoint) as response:
-                data = await response.json()
+    _zeroconf: Optional[Zeroconf] = None
+    browser: Optional[ServiceBrowser] = None
+    _daemon: Optional[Thread] = None
+    _daemon_stop: Event = Event()
+    _known_devices: Dict[str, dict] = {}
 
-                if response.status != 200 or ('error' in data and data['error'] != 0):
-                    Log.error('Error while trying to retrieve devices list: ' + str(data['error']))
-                else:
-                    for device_data in data:
-                        if not CoolkitDevicesRepository.has_device(device_data['deviceid']):
-                            device = CoolkitDevice(device_data)
-                            CoolkitDevicesRepository.add_device(device)
-                            Log.info('Found cloud device: ' + str(device) + ' -> ' + str(device.api_key))
+    @classmethod
+    async def discover(cls, known_devices: dict, refresh: bool = True) -> bool:
+        """
+        Map cloud and known devices then start LAN discovery.
+        Cloud lookup is skipped if not refreshing, known devices are always applied again.
+        """
+        if refresh or not CoolkitDevicesRepository.get_devices():
+            await cls._discover_cloud()
+
+        for device in cls._map_known_devices(known_devices):
+            await device.close()
 
-        cls._map_known_devices(known_devices)
         cls._discover_lan()
         return True
 
     @classmethod
-    def _map_known_devices(cls, known_devices: dict):
-        for device_id in known_devices.keys():
-            if not CoolkitDevicesRepository.has_device(device_id):
-                device_data = {
-                    'deviceid': device_id,
-                    'devicekey': known_devices[device_id]['api_key'],
-                    'brandName': known_devices[device_id]['brand_name'],
-                    'name': known_devices[device_id]['name'],
-                    'productModel': known_devices[device_id]['product_model'],
-                    'online': 1,
-                    'extra': {
-                        'extra': {
-                            'model': known_devices[device_id]['device_model']
-                        }
-                    },
-                    'params': {}
-                }
+    async def _discover_cloud(cls) -> None:
+        devices_endpoint = CoolkitSession.get_api_endpoint_url('api/user/device')
 
-                switches_count = int(known_devices[device_id]['switches'])
-                if switches_count == 1:
-                    device_data['params']['switch'] = {'switch': 'off', 'outlet': 0}
-                elif switches_count > 1:
-                    device_data['params']['switches'] = []
-                    for i in range(0, switches_count):
-                        device_data['params']['switches'].append({'switch': 'off', 'outlet': i})
+        status, data = await CoolkitRequestScheduler.request(
+            'GET',
+            devices_endpoint,
+            priority=CoolkitRequestScheduler.PRIORITY_DISCOVERY,
+            headers=CoolkitSession.get_auth_headers()
+        )
+
+        if status != 200 or ('error' in data and data['error'] != 0):
+            CoolkitCapture.record(CoolkitCapture.EVENT_HTTP, {
+                'method': 'GET', 'url': devices_endpoint, 'status': status, 'response': data
+            })
+            Log.error('Error while trying to retrieve devices list: ' + str(data['error']))
+        else:
+            # Devices themselves are recorded by the repository
+            CoolkitCapture.record(CoolkitCapture.EVENT_HTTP, {
+                'method': 'GET', 'url': devices_endpoint, 'status': status, 'devices': len(data)
+            })
+            cls._register_cloud_devices(data)
 
+    @classmethod
+    def _register_cloud_devices(cls, devices_data: list) -> None:
+        for device_data in devices_data:
+            if not CoolkitDevicesRepository.has_device(device_data['deviceid']):
                 device = CoolkitDevice(device_data)
                 CoolkitDevicesRepository.add_device(device)
+                Log.info('Found cloud device: ' + str(device) + ' -> ' + str(device.api_key))
+
+    @classmethod
+    def _map_known_devices(cls, known_devices: dict) -> List[CoolkitDevice]:
+        """Apply known devices configuration, return devices removed or replaced by a changed configuration"""
+        stale = []
+
+        for device_id in list(cls._known_devices.keys()):
+            if known_devices.get(device_id) != cls._known_devices[device_id]:
+                del cls._known_devices[device_id]
+
+                device = CoolkitDevicesRepository.remove_device(device_id)
+                if device is not None:
+                    stale.append(device)
+                    Log.info('Removed local device: ' + str(device))
+
+        for device_id in known_devices.keys():
+            if not CoolkitDevicesRepository.has_device(device_id):
+                device = CoolkitDevice(cls._get_known_device_data(device_id, known_devices[device_id]))
+                CoolkitDevicesRepository.add_device(device)
+                cls._known_devices[device_id] = dict(known_devices[device_id])
 
                 Log.info('Added local device: ' + str(device) + ' -> ' + str(device.api_key))
 
+        return stale
+
+    @classmethod
+    def _get_known_device_data(cls, device_id: str, known_device: dict) -> dict:
+        device_data = {
+            'deviceid': device_id,
+            'devicekey': known_device['api_key'],
+            'brandName': known_device['brand_name'],
+            'name': known_device['name'],
+            'productModel': known_device['product_model'],
+            'online': 1,
+            'extra': {
+                'extra': {
+                    'model': known_device['device_model']
+                }
+            },
+            'params': {}
+        }
+
+        switches_count = int(known_device['switches'])
+        if switches_count == 1:
+            device_data['params']['switch'] = {'switch': 'off', 'outlet': 0}
+        elif switches_count > 1:
+            device_data['params']['switches'] = []
+            for i in range(0, switches_count):
+                device_data['params']['switches'].append({'switch': 'off', 'outlet': i})
+
+        return device_data
+
     @classmethod
     def _discover_lan(cls) -> bool:
-        cls.browser = ServiceBrowser(Zeroconf(), CoolkitDevice.SERVICE_TYPE, listener=cls)
+        if cls.browser is None:
+            cls._zeroconf = Zeroconf()
+            cls.browser = ServiceBrowser(cls._zeroconf, CoolkitDevice.SERVICE_TYPE, listener=cls)
+
         return True
 
     @classmethod
-    async def _discover_in_background(cls) -> None:
-        while True:
-            await cls.discover({})
-            await asyncio.sleep(60)
+    def stop(cls) -> None:
+        """Stop background discovery, every service browser and the zeroconf instance"""
+        cls.stop_daemon()
+
+        for device in CoolkitDevicesRepository.get_devices().values():
+            device.client.stop_service_browser()
+
+        if cls.browser is not None:
+            cls.browser.cancel()
+            cls.browser = None
+
+        if cls._zeroconf is not None:
+            cls._zeroconf.close()
+            cls._zeroconf = None
 
     @classmethod
     def _start_daemon(cls) -> None:
         loop = asyncio.new_event_loop()
-        loop.run_until_complete(cls._discover_in_background())
+        try:
+            while not cls._daemon_stop.is_set():
+                loop.run_until_complete(cls.discover({}))
+                cls._daemon_stop.wait(cls.DAEMON_INTERVAL)
+        finally:
+            loop.close()
 
     @classmethod
     def start_daemon(cls) -> None:
-        worker = Thread(target=cls._start_daemon)
-        worker.setDaemon(True)
-        worker.start()
+        if cls._daemon is not None and cls._daemon.is_alive():
+            return
+
+        cls._daemon_stop.clear()
+        cls._daemon = Thread(target=cls._start_daemon)
+        cls._daemon.setDaemon(True)
+        cls._daemon.start()
+
+    @classmethod
+    def stop_daemon(cls) -> None:
+        cls._daemon_stop.set()
+
+        if cls._daemon is not None:
+            cls._daemon.join()
+            cls._daemon = None
 
     @classmethod
     def get_device_from_service_name(cls, name: str) -> Optional[CoolkitDevice]:
@@ -113,14 +196,23 @@ class CoolkitDevicesDiscovery:
 
         device = cls.get_device_from_service_name(name)
 
-        if device is not None:
-            Log.info('Found LAN device ' + str(device) + ' -> ' + str(device_ip))
-            device.ip = device_ip
-            device.port = device_port
+        CoolkitCapture.record(CoolkitCapture.EVENT_SERVICE, {'name': name, 'ip': device_ip, 'port': device_port})
+
+        if device is None:
+            return
+
+        Log.info('Found LAN device ' + str(device) + ' -> ' + str(device_ip))
+        device.ip = device_ip
+        device.port = device_port
 
         device.client.start_service_browser(zeroconf, name)
         device.client.update_service(zeroconf, type, name)
 
+    @classmethod
+    def update_service(cls, zeroconf: Zeroconf, type: str, name: str) -> None:
+        """Updates are handled by each device service browser"""
+        pass
+
     @classmethod
     def remove_service(cls, zeroconf: Zeroconf, type: str, name: str) -> None:
         device = cls.get_device_from_service_name(name)
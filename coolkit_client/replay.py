@@ -0,0 +1,76 @@
+"""Replay captured traffic through the decode and dispatch pipeline"""
+import argparse
+import time
+
+from .capture import CoolkitCapture
+from .decoder import CoolkitDecodePipeline
+from .device import CoolkitDevice
+from .devices_repository import CoolkitDevicesRepository
+from .discover import CoolkitDevicesDiscovery
+from .log import Log
+
+
+class CoolkitReplayer:
+    @classmethod
+    def replay(cls, path: str, realtime: bool = True) -> dict:
+        """Feed a capture back at 1x (realtime) or at maximum speed, return throughput stats"""
+        stats = {'events': 0, 'dispatched': 0, 'skipped': 0, 'elapsed': 0.0}
+
+        started_at = time.monotonic()
+        session_started_at = started_at
+        for timestamp, event, data in CoolkitCapture.read(path):
+            if event == CoolkitCapture.EVENT_SESSION:
+                # Timestamps restart at each capture session appended to the same file
+                session_started_at = time.monotonic()
+
+            if realtime:
+                delay = timestamp - (time.monotonic() - session_started_at)
+                if delay > 0:
+                    time.sleep(delay)
+
+            stats['events'] += 1
+            if cls._dispatch(event, data):
+                stats['dispatched'] += 1
+            else:
+                stats['skipped'] += 1
+
+        CoolkitDecodePipeline.join()
+        stats['elapsed'] = time.monotonic() - started_at
+        stats['events_per_second'] = stats['events'] / stats['elapsed'] if stats['elapsed'] else 0.0
+
+        return stats
+
+    @classmethod
+    def _dispatch(cls, event: str, data: dict) -> bool:
+        if event == CoolkitCapture.EVENT_SESSION:
+            return True
+
+        if event == CoolkitCapture.EVENT_DEVICE:
+            if not CoolkitDevicesRepository.has_device(data['device']['deviceid']):
+                CoolkitDevicesRepository.add_device(CoolkitDevice(data['device']))
+            return True
+
+        device = CoolkitDevicesDiscovery.get_device_from_service_name(data.get('name', ''))
+        if device is None:
+            return False
+
+        if event == CoolkitCapture.EVENT_SERVICE:
+            device.ip = data['ip']
+            device.port = data['port']
+            return True
+
+        if event == CoolkitCapture.EVENT_TXT:
+            device.client.handle_properties(CoolkitCapture.decode_properties(data['properties']))
+            return True
+
+        # HTTP and WebSocket exchanges are kept for inspection, there is nothing to dispatch
+        return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a sonoff traffic capture')
+    parser.add_argument('path')
+    parser.add_argument('--max-speed', action='store_true', help='Do not wait between events')
+    args = parser.parse_args()
+
+    Log.info('Replay stats: ' + str(CoolkitReplayer.replay(args.path, realtime=not args.max_speed)))
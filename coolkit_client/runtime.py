@@ -0,0 +1,87 @@
+"""Client library setup and teardown"""
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from .capture import CoolkitCapture
+from .decoder import CoolkitDecodePipeline
+from .devices_repository import CoolkitDevicesRepository
+from .discover import CoolkitDevicesDiscovery
+from .scheduler import CoolkitRequestScheduler
+from .session import CoolkitSession
+
+
+class CoolkitRuntime:
+    """
+    Start and stop session, capture, decoding, discovery and scheduling as a whole.
+    Blocking calls go through run_blocking, e.g. hass.async_add_executor_job.
+    """
+    DISCOVERY_DELAY: float = 2.0
+
+    @classmethod
+    def _get_run_blocking(
+            cls,
+            run_blocking: Optional[Callable[..., Awaitable[Any]]]
+    ) -> Callable[..., Awaitable[Any]]:
+        if run_blocking is not None:
+            return run_blocking
+
+        loop = asyncio.get_event_loop()
+        return lambda target, *args: loop.run_in_executor(None, target, *args)
+
+    @classmethod
+    async def start(
+            cls,
+            username: str,
+            password: str,
+            region: str,
+            known_devices: dict,
+            capture_path: Optional[str] = None,
+            run_blocking: Optional[Callable[..., Awaitable[Any]]] = None
+    ) -> bool:
+        """
+        Log in, then start capture, decoding and discovery.
+        On reload with the same credentials, the session and the devices registry are reused.
+        Nothing is left running if the login fails.
+        """
+        run_blocking = cls._get_run_blocking(run_blocking)
+
+        reused = CoolkitSession.is_logged_in(username, password, region)
+        if not reused:
+            CoolkitSession.logout()
+            await CoolkitDevicesRepository.clear()
+
+            if not await CoolkitSession.login(username, password, region):
+                CoolkitSession.logout()
+                await CoolkitRequestScheduler.close()
+                return False
+
+        try:
+            if capture_path:
+                await run_blocking(CoolkitCapture.start, capture_path)
+
+            CoolkitDecodePipeline.set_loop(asyncio.get_event_loop())
+            await CoolkitDevicesDiscovery.discover(known_devices, refresh=False)
+        except Exception:
+            await cls.stop(run_blocking)
+            raise
+
+        # Give LAN devices time to announce themselves, a reused registry is already up to date
+        if not reused:
+            await asyncio.sleep(cls.DISCOVERY_DELAY)
+
+        return True
+
+    @classmethod
+    async def stop(cls, run_blocking: Optional[Callable[..., Awaitable[Any]]] = None) -> None:
+        """Stop everything started by start(), cached devices and the session are kept for a reload"""
+        run_blocking = cls._get_run_blocking(run_blocking)
+
+        await run_blocking(CoolkitDevicesDiscovery.stop)
+        await run_blocking(CoolkitDecodePipeline.stop)
+        CoolkitDecodePipeline.set_loop(None)
+
+        for device in list(CoolkitDevicesRepository.get_devices().values()):
+            await device.close()
+
+        await CoolkitRequestScheduler.close()
+        await run_blocking(CoolkitCapture.stop)
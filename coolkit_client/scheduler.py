@@ -0,0 +1,197 @@
+"""Prioritized and rate limited scheduler for cloud requests"""
+import asyncio
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from aiohttp import ClientSession
+
+from .log import Log
+
+
+class CoolkitRequestScheduler:
+    """
+    Every cloud HTTP request and WebSocket send goes through a single priority queue.
+    Jobs are started under a token bucket rate limit, identical in-flight GETs are shared and
+    throttled requests are queued again with exponential backoff.
+    """
+    PRIORITY_AUTH: int = 0
+    PRIORITY_INTERACTIVE: int = 1
+    PRIORITY_DISCOVERY: int = 2
+    PRIORITY_STATISTICS: int = 3
+
+    RATE: float = 2.0
+    BURST: int = 5
+    MAX_RETRIES: int = 4
+    BACKOFF_BASE: float = 1.0
+    BACKOFF_MAX: float = 30.0
+    THROTTLE_STATUSES = (429, 503)
+
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _queue: Optional[asyncio.PriorityQueue] = None
+    _worker: Optional[asyncio.Task] = None
+    _session: Optional[ClientSession] = None
+    _sequence = itertools.count()
+    _tokens: float = BURST
+    _refilled_at: float = 0.0
+    _in_flight_gets: Dict[tuple, asyncio.Future] = {}
+    _tasks: Set[asyncio.Task] = set()
+    _futures: Set[asyncio.Future] = set()
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        loop = asyncio.get_event_loop()
+        if cls._loop is loop and cls._worker is not None and not cls._worker.done():
+            return
+
+        cls._loop = loop
+        cls._queue = asyncio.PriorityQueue()
+        cls._in_flight_gets = {}
+        cls._tasks = set()
+        cls._futures = set()
+        cls._session = None
+        cls._tokens = cls.BURST
+        cls._refilled_at = time.monotonic()
+        cls._worker = loop.create_task(cls._work())
+
+    @classmethod
+    async def close(cls) -> None:
+        """Stop the scheduler, cancel running and queued jobs and close its HTTP session"""
+        if cls._worker is not None:
+            cls._worker.cancel()
+            cls._worker = None
+
+        tasks = list(cls._tasks)
+        for task in tasks:
+            task.cancel()
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Callers waiting on queued or running jobs fail with CancelledError
+        for future in list(cls._futures):
+            future.cancel()
+
+        cls._tasks = set()
+        cls._futures = set()
+
+        if cls._session is not None:
+            await cls._session.close()
+            cls._session = None
+
+        cls._loop = None
+        cls._queue = None
+        cls._in_flight_gets = {}
+
+    @classmethod
+    async def _take_token(cls) -> None:
+        while True:
+            now = time.monotonic()
+            cls._tokens = min(cls.BURST, cls._tokens + (now - cls._refilled_at) * cls.RATE)
+            cls._refilled_at = now
+
+            if cls._tokens >= 1:
+                cls._tokens -= 1
+                return
+
+            await asyncio.sleep((1 - cls._tokens) / cls.RATE)
+
+    @classmethod
+    async def _work(cls) -> None:
+        while True:
+            # Wait for a token first, so the job is picked only when it can start and
+            # an interactive job queued meanwhile still runs before lower priorities
+            await cls._take_token()
+
+            priority, sequence, job, attempt, future = await cls._queue.get()
+            if future.done():
+                cls._tokens = min(cls.BURST, cls._tokens + 1)
+                continue
+
+            task = cls._loop.create_task(cls._run(priority, job, attempt, future))
+            cls._tasks.add(task)
+            task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def _run(
+            cls,
+            priority: int,
+            job: Callable[[], Awaitable[Tuple[bool, Any]]],
+            attempt: int,
+            future: asyncio.Future
+    ) -> None:
+        try:
+            throttled, result = await job()
+        except Exception as ex:
+            if not future.done():
+                future.set_exception(ex)
+            return
+
+        if throttled and attempt < cls.MAX_RETRIES:
+            delay = min(cls.BACKOFF_MAX, cls.BACKOFF_BASE * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            Log.warning('Cloud request throttled, retrying in ' + str(round(delay, 1)) + 's')
+            await asyncio.sleep(delay)
+            cls._queue.put_nowait((priority, next(cls._sequence), job, attempt + 1, future))
+            return
+
+        if not future.done():
+            future.set_result(result)
+
+    @classmethod
+    async def submit(
+            cls,
+            job: Callable[[], Awaitable[Tuple[bool, Any]]],
+            priority: int = PRIORITY_INTERACTIVE
+    ) -> Any:
+        """
+        Schedule a job, e.g. a WebSocket send.
+        The job returns a (throttled, result) tuple, throttled jobs are retried with backoff.
+        """
+        cls._ensure_started()
+
+        future = cls._loop.create_future()
+        cls._futures.add(future)
+        future.add_done_callback(cls._futures.discard)
+        cls._queue.put_nowait((priority, next(cls._sequence), job, 0, future))
+
+        return await future
+
+    @classmethod
+    async def request(
+            cls,
+            method: str,
+            url: str,
+            priority: int = PRIORITY_INTERACTIVE,
+            headers: Optional[dict] = None,
+            json: Optional[dict] = None
+    ) -> Tuple[int, Any]:
+        """Schedule a cloud HTTP request and return its status and decoded JSON body"""
+        cls._ensure_started()
+
+        async def job() -> Tuple[bool, Tuple[int, Any]]:
+            if cls._session is None or cls._session.closed:
+                cls._session = ClientSession()
+
+            async with cls._session.request(method, url, headers=headers, json=json) as response:
+                data = await response.json(content_type=None)
+                throttled = response.status in cls.THROTTLE_STATUSES or (
+                    isinstance(data, dict) and data.get('error') in cls.THROTTLE_STATUSES
+                )
+
+                return throttled, (response.status, data)
+
+        if method != 'GET':
+            return await cls.submit(job, priority)
+
+        key = (url, tuple(sorted((headers or {}).items())))
+        if key in cls._in_flight_gets:
+            return await asyncio.shield(cls._in_flight_gets[key])
+
+        future = asyncio.ensure_future(cls.submit(job, priority))
+        cls._in_flight_gets[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if cls._in_flight_gets.get(key) is future:
+                del cls._in_flight_gets[key]
@@ -8,17 +8,23 @@ import random
 import re
 import time
 import uuid
-from aiohttp import ClientSession
+from typing import Optional
 
 from .log import Log
 from .const import COOLKIT_APP_ID, COOLKIT_APP_SECRET
+from .scheduler import CoolkitRequestScheduler
 
 
 class CoolkitSession:
+    API_ENDPOINT_URL: str = 'https://{}-api.coolkit.cc:8080/{}'
+    DISPATCH_ENDPOINT_URL: str = 'https://{}-disp.coolkit.cc:8080/{}'
+
     _bearer_token: str = None
     _user_apikey: str = None
     _region: str = None
     _ws_host: str = None
+    _username: str = None
+    _password_hash: str = None
 
     @classmethod
     def _get_login_data(cls, username: str, password: str) -> dict:
@@ -74,63 +80,108 @@ class CoolkitSession:
     def get_user_api_key(cls):
         return cls._user_apikey
 
+    @classmethod
+    def _hash_password(cls, password: str) -> str:
+        return hashlib.sha256(str.encode(password)).hexdigest()
+
+    @classmethod
+    def is_logged_in(cls, username: str, password: str, region: str) -> bool:
+        """Check if the session belongs to these credentials, any change requires a new login"""
+        return (
+            cls._bearer_token is not None
+            and cls._username == username
+            and cls._password_hash == cls._hash_password(password)
+            and cls._region == region
+        )
+
+    @classmethod
+    def logout(cls) -> None:
+        cls._bearer_token = None
+        cls._user_apikey = None
+        cls._ws_host = None
+        cls._username = None
+        cls._password_hash = None
+
     @classmethod
     def get_ws_endpoint(cls):
         """Get websocket endpoint"""
         return 'wss://{}:8080/api/ws'.format(cls._ws_host)
 
     @classmethod
-    def get_api_endpoint_url(cls, action: str) -> str:
+    def get_api_endpoint_url(cls, action: str, region: str = None) -> str:
         """Get API URL depending on region"""
-        return 'https://{}-api.coolkit.cc:8080/{}'.format(cls._region, action)
+        return cls.API_ENDPOINT_URL.format(region or cls._region, action)
 
     @classmethod
     def get_dispatch_endpoint_url(cls, action: str) -> str:
         """Get dispatch endpoint URL depending on region"""
-        return 'https://{}-disp.coolkit.cc:8080/{}'.format(cls._region, action)
+        return cls.DISPATCH_ENDPOINT_URL.format(cls._region, action)
 
     @classmethod
     async def _dispatch_application(cls) -> bool:
         dispatch_url = cls.get_dispatch_endpoint_url('dispatch/app')
 
-        async with ClientSession(headers=cls.get_auth_headers()) as session:
-            async with session.post(dispatch_url) as response:
-                data = await response.json()
+        status, data = await CoolkitRequestScheduler.request(
+            'POST',
+            dispatch_url,
+            priority=CoolkitRequestScheduler.PRIORITY_AUTH,
+            headers=cls.get_auth_headers()
+        )
 
-                if response.status != 200 or ('error' in data and data['error'] != 0):
-                    Log.error('Error while trying to dispatch application: ' + str(data['error']))
-                    return False
+        if status != 200 or ('error' in data and data['error'] != 0):
+            Log.error('Error while trying to dispatch application: ' + str(data.get('error')))
+            return False
 
-                ws_host = data['domain']
-                Log.info('Application assigned to ws host ' + ws_host)
+        ws_host = data['domain']
+        Log.info('Application assigned to ws host ' + ws_host)
 
-                cls._ws_host = ws_host
-                return True
+        cls._ws_host = ws_host
+        return True
 
     @classmethod
-    async def login(cls, username: str, password: str, region: str) -> bool:
-        """Login to COOLKIT platform"""
-        cls._region = region
-
-        login_url = cls.get_api_endpoint_url('api/user/login')
+    async def _request_login(cls, username: str, password: str, region: str) -> Optional[dict]:
+        """Request a login without changing the current session"""
+        login_url = cls.get_api_endpoint_url('api/user/login', region)
         login_data = cls._get_login_data(
             username=username,
             password=password
         )
         login_headers = cls._get_login_headers(login_data)
 
-        async with ClientSession(headers=login_headers) as session:
-            async with session.post(login_url, json=login_data) as response:
-                data = await response.json()
+        status, data = await CoolkitRequestScheduler.request(
+            'POST',
+            login_url,
+            priority=CoolkitRequestScheduler.PRIORITY_AUTH,
+            headers=login_headers,
+            json=login_data
+        )
+
+        if status != 200 or ('error' in data and data['error'] != 0):
+            Log.error('Error while trying to login: ' + str(data.get('error')) + ' ' + str(data.get('info')))
+            return None
+
+        return data
+
+    @classmethod
+    async def validate_credentials(cls, username: str, password: str, region: str) -> bool:
+        """Check credentials, the current session is left untouched"""
+        return (await cls._request_login(username, password, region)) is not None
+
+    @classmethod
+    async def login(cls, username: str, password: str, region: str) -> bool:
+        """Login to COOLKIT platform"""
+        cls._region = region
 
-                if response.status != 200 or ('error' in data and data['error'] != 0):
-                    Log.error('Error while trying to login: ' + str(data['error']) + ' ' + data['info'])
-                    return False
+        data = await cls._request_login(username, password, region)
+        if data is None:
+            return False
 
-                cls._bearer_token = data['at']
-                cls._user_apikey = data['user']['apikey']
-                Log.info('User ' + username + ' successfully logged in')
+        cls._bearer_token = data['at']
+        cls._user_apikey = data['user']['apikey']
+        cls._username = username
+        cls._password_hash = cls._hash_password(password)
+        Log.info('User ' + username + ' successfully logged in')
 
-                return await cls._dispatch_application()
+        return await cls._dispatch_application()
 
 
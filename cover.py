@@ -0,0 +1,91 @@
+from .coolkit_client.device import CoolkitDeviceCover
+from .coolkit_client import CoolkitDevicesRepository
+from homeassistant.components.cover import (
+    CoverDevice, DOMAIN, ATTR_POSITION, SUPPORT_OPEN, SUPPORT_CLOSE, SUPPORT_STOP, SUPPORT_SET_POSITION
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .coolkit_client import CoolkitDevice
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        async_add_entities
+):
+    ha_entities = []
+
+    devices = CoolkitDevicesRepository.get_devices()
+    for device in devices.values():
+        for i in range(0, len(device.covers)):
+            ha_entities.append(SonoffCover(device, i))
+
+    async_add_entities(ha_entities, update_before_add=False)
+
+
+class SonoffCover(CoverDevice):
+    def __init__(self, device: 'CoolkitDevice', index: int):
+        self._index = index
+        self._device = device
+        self._cover: CoolkitDeviceCover = self._device.covers[self._index]
+        self._cover.add_state_callback(
+            callback_name='hass',
+            callable=self._on_state_change
+        )
+
+    async def _on_state_change(
+            self,
+            cover: CoolkitDeviceCover,
+            changed: dict
+    ) -> None:
+        await self.async_update_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._cover.remove_callback('hass')
+
+    @property
+    def entity_id(self) -> str:
+        return DOMAIN + '.sonoff_' + self._device.device_id
+
+    @property
+    def available(self) -> bool:
+        return self._device.is_online
+
+    @property
+    def name(self) -> str:
+        return self._device.name
+
+    @property
+    def should_poll(self) -> bool:
+        return True
+
+    @property
+    def supported_features(self) -> int:
+        return SUPPORT_OPEN | SUPPORT_CLOSE | SUPPORT_STOP | SUPPORT_SET_POSITION
+
+    @property
+    def current_cover_position(self):
+        return self._cover.position
+
+    @property
+    def is_closed(self):
+        if self._cover.position is None:
+            return None
+
+        return self._cover.position == 0
+
+    async def async_open_cover(self, **kwargs) -> None:
+        await self._cover.open()
+
+    async def async_close_cover(self, **kwargs) -> None:
+        await self._cover.close()
+
+    async def async_stop_cover(self, **kwargs) -> None:
+        await self._cover.stop()
+
+    async def async_set_cover_position(self, **kwargs) -> None:
+        await self._cover.set_position(kwargs[ATTR_POSITION])
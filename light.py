@@ -0,0 +1,112 @@
+from .coolkit_client.device import CoolkitDeviceLight
+from .coolkit_client import CoolkitDevicesRepository
+from homeassistant.components.light import (
+    Light, DOMAIN, ATTR_BRIGHTNESS, ATTR_HS_COLOR, SUPPORT_BRIGHTNESS, SUPPORT_COLOR
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+import homeassistant.util.color as color_util
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .coolkit_client import CoolkitDevice
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        async_add_entities
+):
+    ha_entities = []
+
+    devices = CoolkitDevicesRepository.get_devices()
+    for device in devices.values():
+        for i in range(0, len(device.lights)):
+            ha_entities.append(SonoffLight(device, i))
+
+    async_add_entities(ha_entities, update_before_add=False)
+
+
+class SonoffLight(Light):
+    def __init__(self, device: 'CoolkitDevice', index: int):
+        self._index = index
+        self._device = device
+        self._light: CoolkitDeviceLight = self._device.lights[self._index]
+        self._light.add_state_callback(
+            callback_name='hass',
+            callable=self._on_state_change
+        )
+
+    async def _on_state_change(
+            self,
+            light: CoolkitDeviceLight,
+            changed: dict
+    ) -> None:
+        await self.async_update_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._light.remove_callback('hass')
+
+    @property
+    def entity_id(self) -> str:
+        if len(self._device.lights) > 1:
+            return DOMAIN + '.sonoff_' + self._device.device_id + '_' + str(self._index + 1)
+        else:
+            return DOMAIN + '.sonoff_' + self._device.device_id
+
+    @property
+    def available(self) -> bool:
+        return self._device.is_online
+
+    @property
+    def name(self) -> str:
+        if len(self._device.lights) > 1:
+            return self._device.name + ' ' + str(self._index + 1)
+        else:
+            return self._device.name
+
+    @property
+    def should_poll(self) -> bool:
+        return True
+
+    @property
+    def supported_features(self) -> int:
+        if self._light.supports_color:
+            return SUPPORT_BRIGHTNESS | SUPPORT_COLOR
+
+        return SUPPORT_BRIGHTNESS
+
+    @property
+    def is_on(self) -> bool:
+        return self._light.get_state()
+
+    @property
+    def brightness(self):
+        """Return the brightness, converted from percent to 0..255"""
+        if self._light.brightness is None:
+            return None
+
+        return round(int(self._light.brightness) * 255 / 100)
+
+    @property
+    def hs_color(self):
+        if self._light.rgb is None:
+            return None
+
+        return color_util.color_RGB_to_hs(*self._light.rgb)
+
+    async def async_turn_on(self, **kwargs) -> None:
+        brightness = None
+        rgb = None
+
+        if ATTR_BRIGHTNESS in kwargs:
+            brightness = max(1, round(kwargs[ATTR_BRIGHTNESS] * 100 / 255))
+
+        if ATTR_HS_COLOR in kwargs:
+            rgb = color_util.color_hs_to_RGB(*kwargs[ATTR_HS_COLOR])
+
+        await self._light.turn_on(brightness=brightness, rgb=rgb)
+
+    async def async_turn_off(self, **kwargs) -> None:
+        await self._light.turn_off()
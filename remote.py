@@ -0,0 +1,88 @@
+from .coolkit_client.device import CoolkitDeviceRfBridge
+from .coolkit_client import CoolkitDevicesRepository
+from homeassistant.components.remote import RemoteDevice, DOMAIN
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .coolkit_client import CoolkitDevice
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        async_add_entities
+):
+    ha_entities = []
+
+    devices = CoolkitDevicesRepository.get_devices()
+    for device in devices.values():
+        for i in range(0, len(device.rf_bridges)):
+            ha_entities.append(SonoffRfBridge(device, i))
+
+    async_add_entities(ha_entities, update_before_add=False)
+
+
+class SonoffRfBridge(RemoteDevice):
+    """RF bridge, send_command transmits learned channels by number"""
+
+    def __init__(self, device: 'CoolkitDevice', index: int):
+        self._index = index
+        self._device = device
+        self._rf_bridge: CoolkitDeviceRfBridge = self._device.rf_bridges[self._index]
+        self._rf_bridge.add_state_callback(
+            callback_name='hass',
+            callable=self._on_state_change
+        )
+
+    async def _on_state_change(
+            self,
+            rf_bridge: CoolkitDeviceRfBridge,
+            changed: dict
+    ) -> None:
+        await self.async_update_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._rf_bridge.remove_callback('hass')
+
+    @property
+    def entity_id(self) -> str:
+        return DOMAIN + '.sonoff_' + self._device.device_id
+
+    @property
+    def available(self) -> bool:
+        return self._device.is_online
+
+    @property
+    def name(self) -> str:
+        return self._device.name
+
+    @property
+    def should_poll(self) -> bool:
+        return True
+
+    @property
+    def is_on(self) -> bool:
+        return True
+
+    @property
+    def device_state_attributes(self) -> dict:
+        return {
+            'channels': self._rf_bridge.channels,
+            'last_channel': self._rf_bridge.last_channel,
+        }
+
+    async def async_turn_on(self, **kwargs) -> None:
+        pass
+
+    async def async_turn_off(self, **kwargs) -> None:
+        pass
+
+    async def async_send_command(self, command: Iterable[str], **kwargs) -> None:
+        for channel in command:
+            if int(channel) not in self._rf_bridge.channels:
+                raise ValueError('Channel ' + str(channel) + ' is not learned by ' + self._device.name)
+
+            await self._rf_bridge.transmit(int(channel))
@@ -1,6 +1,5 @@
-from collections import OrderedDict
-
 from homeassistant.const import TEMP_CELSIUS
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 SONOFF_SENSORS_MAP = {
@@ -12,10 +11,9 @@ SONOFF_SENSORS_MAP = {
 }
 
 
-async def async_setup_platform(
+async def async_setup_entry(
         hass: HomeAssistant,
-        config: OrderedDict,
-        async_add_entities,
-        discovery_info=None
+        entry: ConfigEntry,
+        async_add_entities
 ):
     return True
@@ -1,9 +1,9 @@
-from collections import OrderedDict
-
 from .coolkit_client.device import CoolkitDeviceSwitch
 from .coolkit_client import CoolkitDevicesRepository
+from . import DOMAIN as SONOFF_DOMAIN
 from homeassistant.components.switch import SwitchDevice, DOMAIN
 from homeassistant.const import STATE_ON, STATE_OFF
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from typing import TYPE_CHECKING
@@ -12,18 +12,19 @@ if TYPE_CHECKING:
     from .coolkit_client import CoolkitDevice
 
 
-async def async_setup_platform(
+async def async_setup_entry(
         hass: HomeAssistant,
-        config: OrderedDict,
-        async_add_entities,
-        discovery_info=None
+        entry: ConfigEntry,
+        async_add_entities
 ):
     ha_entities = []
 
     devices = CoolkitDevicesRepository.get_devices()
     for device in devices.values():
         for i in range(0, len(device.switches)):
-            ha_entities.append(SonoffSwitch(device, i))
+            entity = SonoffSwitch(device, i)
+            ha_entities.append(entity)
+            hass.data[SONOFF_DOMAIN]['switches'][entity.entity_id] = device.switches[i]
 
     async_add_entities(ha_entities, update_before_add=False)
 
@@ -43,11 +44,17 @@ class SonoffSwitch(SwitchDevice):
     async def _on_state_change(
             self,
             switch: CoolkitDeviceSwitch,
-            new_state: bool
+            changed: dict
     ) -> None:
-        self._state = new_state
+        self._state = switch.get_state()
         await self.async_update_ha_state()
 
+    async def async_will_remove_from_hass(self) -> None:
+        self._switch.remove_callback('hass')
+
+        if SONOFF_DOMAIN in self.hass.data:
+            self.hass.data[SONOFF_DOMAIN]['switches'].pop(self.entity_id, None)
+
     @property
     def entity_id(self) -> str:
         if len(self._device.switches) > 1:
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The client library is importable without Home Assistant, the integration package is not
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    from coolkit_client import CoolkitDevicesRepository, CoolkitSession
+    from coolkit_client.discover import CoolkitDevicesDiscovery
+
+    yield
+
+    CoolkitSession.logout()
+    CoolkitDevicesRepository.get_devices().clear()
+    CoolkitDevicesDiscovery._known_devices.clear()
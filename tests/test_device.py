@@ -0,0 +1,78 @@
+import asyncio
+
+from coolkit_client import CoolkitDevice
+
+
+def build_device(params: dict) -> CoolkitDevice:
+    return CoolkitDevice({
+        'deviceid': '1000aabbcc',
+        'devicekey': 'key',
+        'brandName': 'SONOFF',
+        'name': 'device',
+        'productModel': 'BASIC',
+        'online': 1,
+        'extra': {'extra': {'model': 'PSF-BBA-GL'}},
+        'params': params
+    })
+
+
+def accept_commands(device: CoolkitDevice) -> list:
+    sent = []
+
+    async def send_command(command: str, params: dict) -> bool:
+        sent.append((command, params))
+        return True
+
+    device.client.send_command = send_command
+    return sent
+
+
+def test_switch_state_is_loaded_from_cached_params():
+    device = build_device({'switches': [{'switch': 'on', 'outlet': 0}, {'switch': 'off', 'outlet': 1}]})
+
+    assert [switch.get_state() for switch in device.switches] == [True, False]
+
+
+def test_set_state_matching_cached_params_keeps_switch_state():
+    async def run():
+        device = build_device({'switch': 'on'})
+        sent = accept_commands(device)
+
+        await device.switches[0].set_state(True)
+        assert device.switches[0].get_state() is True
+        assert sent == []
+
+        await device.switches[0].set_state(False)
+        assert device.switches[0].get_state() is False
+        assert sent == [('switch', {'switch': 'off'})]
+
+    asyncio.run(run())
+
+
+def test_partial_update_dispatches_changed_outlets_only():
+    async def run():
+        device = build_device({'switches': [{'switch': 'off', 'outlet': 0}, {'switch': 'off', 'outlet': 1}]})
+        changes = []
+
+        async def callback(switch, attributes):
+            changes.append((switch.index, attributes))
+
+        for switch in device.switches:
+            switch.add_state_callback('test', callback)
+
+        diff = await device.update_params({'switches': [{'switch': 'off', 'outlet': 0}, {'switch': 'on', 'outlet': 1}]})
+
+        assert diff == {'switches': [{'switch': 'on', 'outlet': 1}]}
+        assert changes == [(1, {'on': True})]
+
+    asyncio.run(run())
+
+
+def test_multi_outlet_device_with_switch_param_builds_outlets_only():
+    device = build_device({
+        'switch': 'on',
+        'switches': [{'switch': 'on', 'outlet': i} for i in range(0, 4)]
+    })
+
+    assert len(device.switches) == 4
+    assert all(switch.capability.outlets == 'switches' for switch in device.switches)
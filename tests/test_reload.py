@@ -0,0 +1,216 @@
+"""
+Reload tests through CoolkitRuntime, the same setup and teardown used by the config entry.
+Run them from the tests folder (cd tests && python -m pytest): from the repository root
+pytest imports the integration package, which requires Home Assistant.
+"""
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from aiohttp import web
+
+from coolkit_client import CoolkitDecodePipeline, CoolkitDevicesRepository, CoolkitRuntime, CoolkitSession
+
+
+def known_device(switches: int = 2, api_key: str = 'key') -> dict:
+    return {
+        'api_key': api_key,
+        'brand_name': 'SONOFF',
+        'name': 'known',
+        'product_model': 'DUALR3',
+        'device_model': 'PSF-B04-GL',
+        'switches': switches,
+    }
+
+
+KNOWN_DEVICES = {'1000%06d' % i: known_device() for i in range(0, 20)}
+
+CLOUD_DEVICES = [
+    {
+        'deviceid': 'cloud%d' % i,
+        'devicekey': 'cloud-key',
+        'brandName': 'SONOFF',
+        'name': 'cloud',
+        'productModel': 'BASIC',
+        'online': 1,
+        'extra': {'extra': {'model': 'PSF-BBA-GL'}},
+        'params': {'switch': 'off'}
+    }
+    for i in range(0, 2)
+]
+
+
+class CloudServer:
+    """Local coolkit cloud and LAN device endpoints"""
+
+    def __init__(self):
+        self.logins = 0
+        self.commands = 0
+        self.port = None
+        self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.path.endswith('/api/user/login'):
+            if (await request.json())['password'] == 'wrong':
+                return web.json_response({'error': 401, 'info': 'wrong password'})
+
+            self.logins += 1
+            return web.json_response({'error': 0, 'at': 'token', 'user': {'apikey': 'apikey'}})
+
+        if request.path.endswith('/dispatch/app'):
+            return web.json_response({'error': 0, 'domain': '127.0.0.1'})
+
+        if request.path.endswith('/api/user/device'):
+            return web.json_response(CLOUD_DEVICES)
+
+        if request.path.startswith('/zeroconf/'):
+            self.commands += 1
+            return web.json_response({'error': 0})
+
+        return web.json_response({'error': 404}, status=404)
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self.handle)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+@pytest.fixture(autouse=True)
+def local_cloud(monkeypatch):
+    server = CloudServer()
+    monkeypatch.setattr(CoolkitRuntime, 'DISCOVERY_DELAY', 0)
+    monkeypatch.setattr(CoolkitSession, 'API_ENDPOINT_URL', 'http://127.0.0.1:{port}/{{}}-api/{{}}')
+    monkeypatch.setattr(CoolkitSession, 'DISPATCH_ENDPOINT_URL', 'http://127.0.0.1:{port}/{{}}-disp/{{}}')
+
+    return server
+
+
+def count_fds() -> int:
+    return len(os.listdir('/proc/self/fd'))
+
+
+async def start_server(server: CloudServer) -> None:
+    await server.start()
+
+    for name in ('API_ENDPOINT_URL', 'DISPATCH_ENDPOINT_URL'):
+        setattr(CoolkitSession, name, getattr(CoolkitSession, name).format(port=server.port))
+
+
+async def reload_cycle(server: CloudServer, password: str, known_devices: dict, capture_path: str, run_blocking) -> None:
+    """Set up, receive one LAN update and send one command per device, then unload"""
+    assert await CoolkitRuntime.start(
+        'user@example.com',
+        password,
+        'eu',
+        known_devices,
+        capture_path=capture_path,
+        run_blocking=run_blocking
+    )
+
+    devices = list(CoolkitDevicesRepository.get_devices().values())
+    for device in devices:
+        device.ip = '127.0.0.1'
+        device.port = server.port
+        device.client.handle_properties({b'data1': json.dumps({'switch': 'on'}).encode()})
+
+    assert await run_blocking(CoolkitDecodePipeline.join, 5.0)
+
+    results = await asyncio.gather(*[
+        device.send_components_attributes({device.switches[0]: {'on': not device.switches[0].get_state()}})
+        for device in devices
+    ])
+    assert all(results)
+
+    await CoolkitRuntime.stop(run_blocking)
+
+
+def test_reload_keeps_fds_and_threads_flat(local_cloud, tmp_path):
+    capture_path = str(tmp_path / 'capture.jsonl.gz')
+
+    async def run():
+        executor = ThreadPoolExecutor(max_workers=1)
+        loop = asyncio.get_running_loop()
+
+        def run_blocking(target, *args):
+            return loop.run_in_executor(executor, target, *args)
+
+        await start_server(local_cloud)
+        await run_blocking(lambda: None)
+
+        # Unload must release everything set up acquired, not only avoid growing across reloads
+        baseline = (count_fds(), threading.active_count())
+
+        # The password changes every 10 reloads, forcing a new login and a fresh registry
+        for i in range(0, 100):
+            password = ('secret', 'changed')[i // 10 % 2]
+            await reload_cycle(local_cloud, password, KNOWN_DEVICES, capture_path, run_blocking)
+
+            if i == 0:
+                await asyncio.sleep(0.1)
+                assert (count_fds(), threading.active_count()) == baseline
+
+        await asyncio.sleep(0.1)
+        assert (count_fds(), threading.active_count()) == baseline
+        assert local_cloud.logins == 10
+        assert local_cloud.commands == 100 * (len(KNOWN_DEVICES) + len(CLOUD_DEVICES))
+
+        await local_cloud.stop()
+        executor.shutdown()
+
+    asyncio.run(run())
+
+
+def test_failed_login_starts_nothing(local_cloud):
+    async def run():
+        await start_server(local_cloud)
+        threads = threading.active_count()
+
+        assert not await CoolkitRuntime.start('user@example.com', 'wrong', 'eu', KNOWN_DEVICES)
+
+        assert not CoolkitDevicesRepository.get_devices()
+        assert CoolkitSession.get_bearer_token() is None
+        assert threading.active_count() == threads
+
+        await local_cloud.stop()
+
+    asyncio.run(run())
+
+
+def test_reload_applies_known_devices_changes(local_cloud):
+    async def run():
+        await start_server(local_cloud)
+
+        await CoolkitRuntime.start('user@example.com', 'secret', 'eu', {'a': known_device(switches=2), 'b': known_device()})
+        await CoolkitRuntime.stop()
+        device_b = CoolkitDevicesRepository.get_device('b')
+        cloud_device = CoolkitDevicesRepository.get_device('cloud0')
+
+        await CoolkitRuntime.start('user@example.com', 'secret', 'eu', {'a': known_device(switches=4, api_key='new'), 'b': known_device()})
+        await CoolkitRuntime.stop()
+
+        assert len(CoolkitDevicesRepository.get_device('a').switches) == 4
+        assert CoolkitDevicesRepository.get_device('a').api_key == 'new'
+        assert CoolkitDevicesRepository.get_device('b') is device_b
+
+        await CoolkitRuntime.start('user@example.com', 'secret', 'eu', {'b': known_device()})
+        await CoolkitRuntime.stop()
+
+        assert not CoolkitDevicesRepository.has_device('a')
+        assert CoolkitDevicesRepository.get_device('b') is device_b
+        assert CoolkitDevicesRepository.get_device('cloud0') is cloud_device
+        assert local_cloud.logins == 1
+
+        await local_cloud.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,35 @@
+import asyncio
+
+from coolkit_client import CoolkitRequestScheduler
+
+
+def test_interactive_job_overtakes_discovery_while_throttled(monkeypatch):
+    monkeypatch.setattr(CoolkitRequestScheduler, 'RATE', 20.0)
+
+    async def run():
+        started = []
+
+        def job(name: str):
+            async def run_job():
+                started.append(name)
+                return False, name
+
+            return run_job
+
+        # Drain the token bucket
+        await asyncio.gather(*[CoolkitRequestScheduler.submit(job('burst')) for _ in range(0, CoolkitRequestScheduler.BURST)])
+
+        discovery = asyncio.ensure_future(
+            CoolkitRequestScheduler.submit(job('discovery'), CoolkitRequestScheduler.PRIORITY_DISCOVERY)
+        )
+        await asyncio.sleep(0.01)
+        interactive = asyncio.ensure_future(
+            CoolkitRequestScheduler.submit(job('interactive'), CoolkitRequestScheduler.PRIORITY_INTERACTIVE)
+        )
+
+        assert await asyncio.gather(discovery, interactive) == ['discovery', 'interactive']
+        assert started[CoolkitRequestScheduler.BURST:] == ['interactive', 'discovery']
+
+        await CoolkitRequestScheduler.close()
+
+    asyncio.run(run())